@@ -0,0 +1 @@
+"""CHFS household-debt dashboard: data cleaning, aggregate queries and the local query API."""
@@ -0,0 +1,188 @@
+"""
+本地 HTTP / JSON 查询接口
+
+Serves the dashboard's aggregate numbers to non-Streamlit consumers, backed by
+the same background-refreshed snapshot and `chfs_dashboard.queries` code:
+
+    python -m chfs_dashboard.api --data-dir /data/chfs --port 8765
+
+Endpoints
+    GET  /health                          snapshot version and source files
+    GET  /query/<name>?n=10               a named query (see queries.QUERIES); its
+                                          parameters (queries.QUERY_PARAMS) go in
+                                          the query string
+    GET  /groupby?by=region_en,rural      ad-hoc weighted group-by; extra
+                                          query-string keys act as filters
+    POST /batch                           {"queries": [{"name": ..., "by": [...],
+                                          "where": {...}}, {"name": "city_rank",
+                                          "n": 10}, ...]} -> {"results": [...]}
+
+Invalid queries or parameters get a 400; a query with no data for the loaded
+snapshot (e.g. regional_stack without a region column) gets a 404. In a batch
+these are reported per entry as {"query": ..., "error": ...}.
+
+Add `format=arrow` (or `Accept: application/vnd.apache.arrow.stream`) to the
+GET endpoints to stream the result as Arrow IPC record batches instead of JSON.
+"""
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .data import DATA_DIR, REFRESH_INTERVAL_SEC, DataRefresher
+from .queries import QueryCache
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+ARROW_BATCH_ROWS = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def frame_to_records(result):
+    """DataFrame -> JSON-ready list of dicts (NaN becomes null)."""
+    return json.loads(result.to_json(orient='records', force_ascii=False))
+
+
+def no_data_message(name):
+    return f"Query {name!r} has no data: the loaded snapshot lacks the columns it needs"
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Request handler; `self.server` carries `refresher` and `cache` (see make_server)."""
+    server_version = "CHFSQuery/1.0"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        fmt = params.pop('format', None)
+        if fmt is None and ARROW_MIME in self.headers.get('Accept', ''):
+            fmt = 'arrow'
+
+        snapshot = self.server.refresher.current()
+        if url.path == '/health':
+            body = {'status': 'ok' if snapshot else 'no-data'}
+            if snapshot:
+                body.update(version=snapshot.version, master=snapshot.master_path,
+                            hh=snapshot.hh_path, loaded_at=snapshot.loaded_at)
+            return self._send_json(200 if snapshot else 503, body)
+        if snapshot is None:
+            return self._send_json(503, {'error': 'No data loaded yet'})
+
+        if url.path.startswith('/query/'):
+            name, query = url.path[len('/query/'):], params
+        elif url.path == '/groupby':
+            by = params.pop('by', '')
+            name = 'groupby'
+            query = {'by': [c for c in by.split(',') if c],
+                     'where': {k: v.split(',') for k, v in params.items()}}
+        else:
+            return self._send_json(404, {'error': f'Unknown path: {url.path}'})
+
+        try:
+            result = self.server.cache.run(snapshot, name, query)
+        except (ValueError, TypeError) as e:
+            return self._send_json(400, {'error': str(e)})
+        if result is None:
+            return self._send_json(404, {'error': no_data_message(name)})
+
+        if fmt == 'arrow':
+            return self._send_arrow(result, snapshot.version)
+        self._send_json(200, {'version': snapshot.version, 'query': name, 'rows': frame_to_records(result)})
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/batch':
+            return self._send_json(404, {'error': f'Unknown path: {self.path}'})
+        snapshot = self.server.refresher.current()
+        if snapshot is None:
+            return self._send_json(503, {'error': 'No data loaded yet'})
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            requests = json.loads(self.rfile.read(length) or b'{}').get('queries', [])
+            if not isinstance(requests, list):
+                raise ValueError('"queries" must be a list')
+        except (ValueError, AttributeError) as e:
+            return self._send_json(400, {'error': f'Invalid batch body: {e}'})
+
+        # Every entry is answered from the same snapshot, so the batch is consistent
+        results = []
+        for req in requests:
+            if not isinstance(req, dict):
+                results.append({'query': None, 'error': f'Batch entries must be objects, got {req!r}'})
+                continue
+            name = req.get('name', 'groupby')
+            params = {k: v for k, v in req.items() if k != 'name'}
+            try:
+                result = self.server.cache.run(snapshot, name, params)
+            except (ValueError, TypeError) as e:
+                results.append({'query': name, 'error': str(e)})
+                continue
+            if result is None:
+                results.append({'query': name, 'error': no_data_message(name)})
+            else:
+                results.append({'query': name, 'rows': frame_to_records(result)})
+        self._send_json(200, {'version': snapshot.version, 'results': results})
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_arrow(self, result, version):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return self._send_json(406, {'error': 'Arrow output requires pyarrow'})
+
+        table = pa.Table.from_pandas(result, preserve_index=False)
+        self.send_response(200)
+        self.send_header('Content-Type', ARROW_MIME)
+        self.send_header('X-Snapshot-Version', str(version))
+        # No Content-Length: batches are written as they are produced and the
+        # connection is closed to mark the end of the stream
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        with pa.ipc.new_stream(self.wfile, table.schema) as writer:
+            for batch in table.to_batches(max_chunksize=ARROW_BATCH_ROWS):
+                writer.write_batch(batch)
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+def make_server(host='127.0.0.1', port=8765, refresher=None):
+    """Build (but do not start) a threaded query server around `refresher`."""
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    server.refresher = refresher or DataRefresher().start()
+    server.cache = QueryCache()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve CHFS dashboard aggregates as JSON / Arrow.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--refresh-interval', type=int, default=REFRESH_INTERVAL_SEC)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    refresher = DataRefresher(args.data_dir, interval=args.refresh_interval).start()
+    server = make_server(args.host, args.port, refresher)
+    logger.info("Serving CHFS queries on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        refresher.stop()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+图表生成函数
+
+Each `plot_*` takes the cleaned household frame and returns a pyecharts chart
+(`charts.echarts`) or a Plotly figure (`charts.figures`), or None when the
+needed columns are missing. Numbers come from chfs_dashboard.queries. The two
+submodules are split by library so each is imported only when needed; this
+package itself imports neither.
+"""
+
+
+def chart_builders():
+    """Chart name -> builder, in page order; used by payload size reporting and budget checks."""
+    from . import echarts, figures
+    return {
+        'urban_rural': echarts.plot_urban_rural,
+        'regional_stack': echarts.plot_regional_stack,
+        'province_map': figures.plot_china_map_plotly,
+        'city_tier_boxplot': figures.plot_city_tier_boxplot,
+        'city_rank': echarts.plot_city_rank,
+        'city_map': figures.plot_geo_debt_map_comprehensive,
+        'debt_sunburst': figures.plot_debt_sunburst,
+        'debt_income_ratio_sunburst': figures.plot_debt_income_ratio_sunburst,
+    }
+
+
+def compare_builders():
+    """Comparison-mode builders: (cohort-tagged frame, (label A, label B)) -> chart."""
+    from . import echarts, figures
+    return {
+        'urban_rural': echarts.plot_urban_rural_compare,
+        'regional_stack': echarts.plot_regional_compare,
+        'province_map': figures.plot_china_map_compare,
+        'city_rank': echarts.plot_city_rank_compare,
+    }
@@ -0,0 +1,269 @@
+"""
+ECharts 图表 (pyecharts): 图1 城乡, 图2 区域, 图5/7 城市排名, 以及它们的对比版本
+
+Importing this module loads pyecharts; the page only does so when the first
+ECharts section renders. As in charts.figures, `agg` is an optional
+precomputed queries.chart_aggregates frame for the chart.
+"""
+import pandas as pd
+from pyecharts import options as opts
+from pyecharts.charts import Bar, Line
+from pyecharts.globals import ThemeType
+
+from .. import queries
+from ..config import (
+    COLOR_BLUE, COLOR_YELLOW, COLOR_COHORT_A, COLOR_COHORT_B, COLOR_RATIO_A, COLOR_RATIO_B,
+    COLOR_COHORT_A_RURAL, COLOR_COHORT_B_RURAL,
+)
+
+AXIS_GRAY = "#6E7079"
+LEFT_AXIS_NAME = "Avg Debt (10k)"
+RIGHT_AXIS_NAME = "D/I Ratio"
+
+def plot_urban_rural(df, agg=None):
+    """图1"""
+    df_rural = queries.urban_rural(df) if agg is None else agg
+    if df_rural is None: return None
+
+    bar = (
+        Bar(init_opts=opts.InitOpts(theme=ThemeType.LIGHT))
+        .add_xaxis(df_rural['rural_name'].tolist())
+        .add_yaxis(LEFT_AXIS_NAME, df_rural['avg_debt_10k'].round(2).tolist(), yaxis_index=0, color=COLOR_BLUE, bar_width="40%")
+        .extend_axis(
+            yaxis=opts.AxisOpts(
+                name=RIGHT_AXIS_NAME, type_="value", min_=0, position="right",
+                axisline_opts=opts.AxisLineOpts(linestyle_opts=opts.LineStyleOpts(color=AXIS_GRAY)),
+                name_location="end"
+            )
+        )
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title="Urban vs. Rural: Debt Burden & Risk"),
+            tooltip_opts=opts.TooltipOpts(trigger="axis", axis_pointer_type="cross"),
+            yaxis_opts=opts.AxisOpts(
+                name=LEFT_AXIS_NAME, name_location="end",
+                axisline_opts=opts.AxisLineOpts(linestyle_opts=opts.LineStyleOpts(color=AXIS_GRAY))
+            )
+        )
+    )
+    line = (
+        Line()
+        .add_xaxis(df_rural['rural_name'].tolist())
+        .add_yaxis(RIGHT_AXIS_NAME, df_rural['d_i_ratio'].round(2).tolist(), yaxis_index=1, z=10, color=COLOR_YELLOW, symbol="circle", symbol_size=8, linestyle_opts=opts.LineStyleOpts(width=3))
+    )
+    return bar.overlap(line)
+
+def plot_regional_stack(df, agg=None):
+    """图2"""
+    df_reg = queries.regional_stack(df) if agg is None else agg
+    if df_reg is None: return None
+    
+    regions = df_reg['region_en'].tolist()
+    urban_data = df_reg['urban_avg_debt_10k'].round(2).tolist()
+    rural_data = df_reg['rural_avg_debt_10k'].round(2).tolist()
+    ratio_data = df_reg['d_i_ratio'].round(2).tolist()
+    
+    bar = (
+        Bar(init_opts=opts.InitOpts(theme=ThemeType.LIGHT))
+        .add_xaxis(regions)
+        .add_yaxis("Urban Debt", urban_data, stack="stack1", color=COLOR_BLUE, bar_width="40%")
+        .add_yaxis("Rural Debt", rural_data, stack="stack1", color="#72b0ea") 
+        .extend_axis(
+            yaxis=opts.AxisOpts(
+                name=RIGHT_AXIS_NAME, type_="value", min_=0, position="right", name_location="end",
+                axisline_opts=opts.AxisLineOpts(linestyle_opts=opts.LineStyleOpts(color=AXIS_GRAY)),
+                axislabel_opts=opts.LabelOpts(formatter="{value}"),
+                splitline_opts=opts.SplitLineOpts(is_show=False)
+            )
+        )
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title="Regional Debt Composition & Risk Level"),
+            yaxis_opts=opts.AxisOpts(
+                name=LEFT_AXIS_NAME, name_location="end",
+                axisline_opts=opts.AxisLineOpts(linestyle_opts=opts.LineStyleOpts(color=AXIS_GRAY))
+            ),
+            tooltip_opts=opts.TooltipOpts(trigger="axis", axis_pointer_type="cross"),
+            legend_opts=opts.LegendOpts(pos_top="0%")
+        )
+    )
+    
+    line = (
+        Line()
+        .add_xaxis(regions)
+        .add_yaxis(
+            RIGHT_AXIS_NAME, ratio_data, yaxis_index=1, color=COLOR_YELLOW, 
+            symbol="circle", symbol_size=8, is_smooth=True, linestyle_opts=opts.LineStyleOpts(width=3), z=10
+        )
+    )
+    return bar.overlap(line)
+
+def plot_city_rank(df, agg=None):
+    """图5: 城市排名 (Top黄色，Bottom绿色) - 字典兼容版"""
+    # 1. 数据计算
+    df_rank = queries.city_rank(df, n=5) if agg is None else agg
+    if df_rank is None: return None
+
+    top5 = df_rank[df_rank['group'] == 'top']
+    bottom5 = df_rank[df_rank['group'] == 'bottom']
+    overall_val = df_rank.loc[df_rank['group'] == 'national', 'avg_debt_10k'].iloc[0]
+
+    # 2. X 轴标签
+    x_data = [f"Top{i+1}\n{n}" for i,n in enumerate(top5['city'])] + \
+             ["National\nAvg"] + \
+             [f"Last{i+1}\n{n}" for i,n in enumerate(bottom5['city'])]
+
+    # 3. Y 轴数据 - 使用字典格式，避免 opts.BarItem 报错
+    y_data_items = []
+
+    # 颜色定义
+    COLOR_TOP = "#fac858"   # 黄色
+    COLOR_AVG = "#c0c4c6"   # 灰色
+    COLOR_BOT = "#91cc75"   # 绿色
+
+    # Top 5 -> 黄色
+    for val in top5['avg_debt_10k'].tolist():
+        y_data_items.append({
+            "value": round(val, 2),
+            "itemStyle": {"color": COLOR_TOP}
+        })
+
+    # National Avg -> 灰色
+    y_data_items.append({
+        "value": round(overall_val, 2),
+        "itemStyle": {"color": COLOR_AVG}
+    })
+
+    # Bottom 5 -> 绿色
+    for val in bottom5['avg_debt_10k'].tolist():
+        y_data_items.append({
+            "value": round(val, 2),
+            "itemStyle": {"color": COLOR_BOT}
+        })
+
+    # 4. 绘图
+    c = (
+        Bar()
+        .add_xaxis(x_data)
+        .add_yaxis(
+            "Avg Debt (10k)", 
+            y_data_items,  # 传入字典列表
+            category_gap="30%"
+        )
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title="City Debt Ranking: Extremes vs. Average"),
+            yaxis_opts=opts.AxisOpts(name="10k RMB"),
+            xaxis_opts=opts.AxisOpts(axislabel_opts=opts.LabelOpts(rotate=0, font_size=10)),
+            legend_opts=opts.LegendOpts(is_show=False) # 隐藏图例, 因为颜色已能说明问题
+        )
+    )
+    return c
+
+# ==========================================
+# 对比模式 (Cohort A vs B)
+# ==========================================
+
+def _values(series, digits=2):
+    """Rounded list for pyecharts; missing cohorts become gaps instead of NaN."""
+    return [None if pd.isna(v) else round(float(v), digits) for v in series]
+
+def _with_delta(name, delta, fmt="{:+.2f}"):
+    return name if pd.isna(delta) else f"{name}\nΔ {fmt.format(delta)}"
+
+def _compare_bar_line(debt, ratio, labels, title, bars=None):
+    """
+    A / B bars of avg debt and A / B lines of D/I ratio; x labels carry the debt delta.
+
+    `bars` replaces the default A / B debt bars with [(name, values, color, stack)].
+    """
+    label_a, label_b = labels
+    x_data = [_with_delta(n, d) for n, d in zip(debt.iloc[:, 0], debt['delta'])]
+    if bars is None:
+        bars = [(f"{LEFT_AXIS_NAME} · {label_a}", _values(debt['A']), COLOR_COHORT_A, None),
+                (f"{LEFT_AXIS_NAME} · {label_b}", _values(debt['B']), COLOR_COHORT_B, None)]
+    bar = Bar(init_opts=opts.InitOpts(theme=ThemeType.LIGHT)).add_xaxis(x_data)
+    for name, values, color, stack in bars:
+        bar.add_yaxis(name, values, color=color, stack=stack)
+    bar = (
+        bar
+        .extend_axis(
+            yaxis=opts.AxisOpts(
+                name=RIGHT_AXIS_NAME, type_="value", min_=0, position="right", name_location="end",
+                axisline_opts=opts.AxisLineOpts(linestyle_opts=opts.LineStyleOpts(color=AXIS_GRAY)),
+                splitline_opts=opts.SplitLineOpts(is_show=False)
+            )
+        )
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title=title),
+            yaxis_opts=opts.AxisOpts(
+                name=LEFT_AXIS_NAME, name_location="end",
+                axisline_opts=opts.AxisLineOpts(linestyle_opts=opts.LineStyleOpts(color=AXIS_GRAY))
+            ),
+            tooltip_opts=opts.TooltipOpts(trigger="axis", axis_pointer_type="cross"),
+            legend_opts=opts.LegendOpts(pos_top="8%")
+        )
+    )
+    line = (
+        Line()
+        .add_xaxis(x_data)
+        .add_yaxis(f"{RIGHT_AXIS_NAME} · {label_a}", _values(ratio['A']), yaxis_index=1, z=10,
+                   color=COLOR_RATIO_A, symbol="circle", symbol_size=8, linestyle_opts=opts.LineStyleOpts(width=3))
+        .add_yaxis(f"{RIGHT_AXIS_NAME} · {label_b}", _values(ratio['B']), yaxis_index=1, z=10,
+                   color=COLOR_RATIO_B, symbol="diamond", symbol_size=8, linestyle_opts=opts.LineStyleOpts(width=3, type_="dashed"))
+    )
+    return bar.overlap(line)
+
+def plot_urban_rural_compare(df_cmp, labels=('A', 'B')):
+    """图1 对比: 城乡户均负债与负债收入比, A vs B"""
+    agg = queries.urban_rural(df_cmp, cohort=True)
+    if agg is None: return None
+    debt = queries.cohort_deltas(agg, 'rural_name', 'avg_debt_10k')
+    ratio = queries.cohort_deltas(agg, 'rural_name', 'd_i_ratio').set_index('rural_name').reindex(debt['rural_name'])
+    return _compare_bar_line(debt, ratio, labels, f"Urban vs. Rural: {labels[0]} vs {labels[1]}")
+
+def plot_regional_compare(df_cmp, labels=('A', 'B')):
+    """图2 对比: 各区域城 / 乡户均负债按 cohort 分别堆叠, 加 A / B 负债收入比; x 轴标注区域户均负债差值"""
+    agg = queries.regional_compare(df_cmp)
+    if agg is None or agg.empty: return None
+    debt = queries.cohort_deltas(agg, 'region_en', 'avg_debt_10k')
+    ratio = queries.cohort_deltas(agg, 'region_en', 'd_i_ratio').set_index('region_en').reindex(debt['region_en'])
+
+    bars = []
+    for cohort, label, colors in zip(queries.COHORTS, labels, ((COLOR_COHORT_A, COLOR_COHORT_A_RURAL),
+                                                              (COLOR_COHORT_B, COLOR_COHORT_B_RURAL))):
+        side = agg[agg[queries.COHORT_KEY] == cohort].set_index('region_en').reindex(debt['region_en'])
+        bars.append((f"Urban Debt · {label}", _values(side['urban_avg_debt_10k']), colors[0], cohort))
+        bars.append((f"Rural Debt · {label}", _values(side['rural_avg_debt_10k']), colors[1], cohort))
+    return _compare_bar_line(debt, ratio, labels, f"Regional Debt Composition & Risk: {labels[0]} vs {labels[1]}", bars)
+
+def plot_city_rank_compare(df_cmp, labels=('A', 'B'), n=5):
+    """图7 对比: 各 cohort 自身的 Top/Bottom 城市, 按名次对齐"""
+    ranked = queries.city_rank(df_cmp, n=n, cohort=True)
+    if ranked is None or ranked.empty: return None
+
+    slots = pd.DataFrame(
+        [('top', i) for i in range(1, n + 1)] + [('national', 0)] + [('bottom', i) for i in range(1, n + 1)],
+        columns=['group', 'rank'],
+    )
+    for c in queries.COHORTS:
+        side = ranked[ranked[queries.COHORT_KEY] == c][['group', 'rank', 'city', 'avg_debt_10k']]
+        slots = slots.merge(side.rename(columns={'city': f'city_{c}', 'avg_debt_10k': c}), on=['group', 'rank'], how='left')
+    slots = slots.dropna(subset=['A', 'B'], how='all')
+
+    def slot_label(row):
+        if row['group'] == 'national': head = "National\nAvg"
+        else: head = f"{'Top' if row['group'] == 'top' else 'Last'}{row['rank']}\n{row['city_A'] or '-'} | {row['city_B'] or '-'}"
+        return _with_delta(head, row['B'] - row['A'])
+    x_data = [slot_label(r) for r in slots.fillna({'city_A': '', 'city_B': ''}).to_dict('records')]
+
+    c = (
+        Bar()
+        .add_xaxis(x_data)
+        .add_yaxis(labels[0], _values(slots['A']), color=COLOR_COHORT_A, category_gap="30%")
+        .add_yaxis(labels[1], _values(slots['B']), color=COLOR_COHORT_B)
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title=f"City Debt Ranking: {labels[0]} vs {labels[1]}"),
+            yaxis_opts=opts.AxisOpts(name="10k RMB"),
+            xaxis_opts=opts.AxisOpts(axislabel_opts=opts.LabelOpts(rotate=0, font_size=9)),
+            legend_opts=opts.LegendOpts(pos_top="8%")
+        )
+    )
+    return c
@@ -0,0 +1,166 @@
+"""
+Plotly 图表: 图3 省级地图, 图4 层级箱线图, 图6 城市地图, 旭日图, 以及地图的对比版本
+
+Importing this module loads plotly; the page only does so when the first
+Plotly section renders. Every figure goes through payload.compact_figure.
+Each `plot_*` takes an optional `agg`, the matching frame from
+queries.chart_aggregates (built once per snapshot); without it the frame is
+computed from `df`. `agg` frames are shared, so they are never modified here.
+"""
+import plotly.express as px
+import plotly.graph_objects as go
+
+from .. import queries
+from ..config import COLOR_BLUE
+from ..payload import compact_figure
+
+# Hover text px.sunburst(path=...) produced; ids= / parents= mode drops the value line
+SUNBURST_HOVER = "labels=%{{label}}<br>{0}_sum=%{{value}}<br>parent=%{{parent}}<br>id=%{{id}}<br>{0}=%{{color}}<extra></extra>"
+
+def plot_china_map_plotly(df, agg=None):
+    """图3"""
+    df_plot = queries.province_map(df) if agg is None else agg
+    if df_plot is None or df_plot.empty: return None
+
+    df_plot = df_plot.assign(avg_debt_10k=df_plot['avg_debt_10k'].round(2), ratio_display=df_plot['d_i_ratio'].round(2))
+
+    fig = px.scatter_geo(
+        df_plot, lat='lat', lon='lon', size='avg_debt_10k', color='ratio_display',
+        hover_name='prov', size_max=35, color_continuous_scale='RdYlBu_r', 
+        scope='asia', title="Provincial Debt Map: Volume vs. Risk"
+    )
+    fig.update_layout(
+        geo=dict(center=dict(lat=35, lon=105), projection_scale=2.5, showland=True, landcolor="#f4f4f4", showcountries=True),
+        margin={"r":0,"t":40,"l":0,"b":0},
+        coloraxis_colorbar=dict(title="D/I Ratio")
+    )
+    return compact_figure(fig, precision=2)
+
+def plot_city_tier_boxplot(df, agg=None):
+    """
+    图4: [优化版] 城市层级 - 家庭负债金额分布 (Total Debt Distribution)
+    改动：从 Ratio 改为 绝对金额，以展示明显的层级差异
+    """
+    # 1-3. 有负债家庭的负债金额 (看绝对金额，不再看比例), 按层级预先计算分位数 (见 queries.tier_debt_box)
+    stats = queries.tier_debt_box(df) if agg is None else agg
+    if stats is None or stats.empty: return None
+
+    # 4. 绘制箱线图 (不再把每户数据发给浏览器)
+    fig = go.Figure()
+    for row in stats.to_dict('records'):
+        tier = row.pop('tier_label')
+        fig.add_trace(go.Box(
+            x=[tier], name=tier, notched=True,
+            marker_color=COLOR_BLUE, # 统一使用主题蓝
+            **{k: [v] for k, v in row.items()}
+        ))
+    fig.update_layout(title="Distribution of Household Total Debt Amount (by Tier)")
+    
+    # 5. 样式优化
+    fig.update_layout(
+        height=400,
+        xaxis_title=None,
+        yaxis_title="Total Debt (RMB)",
+        showlegend=False,
+        yaxis=dict(
+            gridcolor='#eee',
+            zerolinecolor='#eee',
+            # 【关键】设置显示范围：0 到 300万。
+            # 如果你的数据里大部分人负债都在100万以内，可以改成 1000000
+            # 这样能过滤掉极少数的超级富豪，让箱体看起来更清楚
+            range=[0, 3000000] 
+        )
+    )
+    
+    return compact_figure(fig, precision=0)
+
+def plot_geo_debt_map_comprehensive(df, agg=None):
+    """图6: 城市债务地图"""
+    df_plot = queries.city_map(df, limit=80) if agg is None else agg
+    if df_plot is None or df_plot.empty: return None
+
+    df_plot = df_plot.assign(avg_debt_10k=df_plot['avg_debt_10k'].round(2))
+    df_plot['Risk Ratio'] = df_plot['d_i_ratio'].round(2)
+
+    fig = px.scatter_geo(
+        df_plot,
+        lat='lat',
+        lon='lon',
+        size='avg_debt_10k',    
+        color='Risk Ratio',     
+        hover_name='final_city_name',
+        size_max=25,
+        color_continuous_scale='RdYlBu_r', 
+        scope='asia',
+        title=f"Key City Debt Map (Size=Burden, Color=Risk)"
+    )
+
+    fig.update_layout(
+        geo=dict(center=dict(lat=36, lon=104), projection_scale=3.0, showland=True, landcolor="#f4f4f4", showcountries=True, countrycolor="#dedede"),
+        margin={"r":0,"t":40,"l":0,"b":0},
+        coloraxis_colorbar=dict(title="D/I Ratio")
+    )
+    return compact_figure(fig, precision=2)
+
+def plot_debt_sunburst(df, min_share=queries.SUNBURST_MIN_SHARE, agg=None):
+    """图7: 旭日图 (绝对债务金额); 占上级不足 `min_share` 的城市层级合并为 queries.OTHER_LABEL"""
+    # 城乡 > 区域 > 省 (Pinyin) > 城市层级 的节点表 (见 queries.debt_sunburst)
+    nodes = queries.debt_sunburst(queries.sunburst_hierarchy(df), min_share) if agg is None else agg
+    if nodes is None: return None
+
+    fig = px.sunburst(
+        nodes, ids='id', parents='parent', names='label', branchvalues='total',
+        values='weighted_debt', 
+        title="Hierarchical View: Where is the Total Debt Concentrated? (Absolute Debt)",
+        color='color', labels={'color': 'weighted_debt'}, color_continuous_scale='RdBu_r'
+    )
+    fig.update_traces(hovertemplate=SUNBURST_HOVER.format('weighted_debt'))
+    fig.update_layout(margin=dict(t=40, l=0, r=0, b=0), height=600)
+    return compact_figure(fig, precision=queries.DEBT_SUNBURST_PRECISION)
+
+def plot_debt_income_ratio_sunburst(df, min_share=queries.SUNBURST_MIN_SHARE, agg=None):
+    """新图: 旭日图 (债务收入比); 占上级不足 `min_share` 的城市层级合并为 queries.OTHER_LABEL"""
+    # Weighted debt / income ratio per node (see queries.debt_income_ratio_sunburst)
+    nodes = queries.debt_income_ratio_sunburst(queries.sunburst_hierarchy(df), min_share) if agg is None else agg
+    if nodes is None: return None
+
+    fig = px.sunburst(
+        nodes, ids='id', parents='parent', names='label', branchvalues='total',
+        values='debt_income_ratio', # Use debt_income_ratio for values
+        title="Hierarchical View: Debt-to-Income Ratio by Demographics",
+        color='color', labels={'color': 'debt_income_ratio'},
+        color_continuous_scale='RdYlGn_r' # Use a diverging scale for ratios, green for low, red for high
+    )
+    fig.update_traces(hovertemplate=SUNBURST_HOVER.format('debt_income_ratio'))
+    fig.update_layout(margin=dict(t=40, l=0, r=0, b=0), height=600)
+    return compact_figure(fig, precision=queries.RATIO_SUNBURST_PRECISION)
+
+# ==========================================
+# 对比模式 (Cohort A vs B)
+# ==========================================
+
+def plot_china_map_compare(df_cmp, labels=('A', 'B')):
+    """图3 对比: 省级地图按 cohort 分面, 悬停显示 B-A 差值"""
+    df_plot = queries.province_map(df_cmp, cohort=True)
+    if df_plot is None or df_plot.empty: return None
+
+    delta_col = "Δ Avg Debt (10k)"
+    delta = queries.cohort_deltas(df_plot, 'prov', 'avg_debt_10k')[['prov', 'delta']]
+    df_plot = df_plot.merge(delta.rename(columns={'delta': delta_col}), on='prov', how='left')
+    df_plot['avg_debt_10k'] = df_plot['avg_debt_10k'].round(2)
+    df_plot['ratio_display'] = df_plot['d_i_ratio'].round(2)
+    df_plot['Cohort'] = df_plot[queries.COHORT_KEY].map(dict(zip(queries.COHORTS, labels)))
+
+    fig = px.scatter_geo(
+        df_plot, lat='lat', lon='lon', size='avg_debt_10k', color='ratio_display',
+        hover_name='prov', hover_data={delta_col: ':.2f', 'lat': False, 'lon': False},
+        facet_col='Cohort', category_orders={'Cohort': list(labels)},
+        size_max=35, color_continuous_scale='RdYlBu_r',
+        scope='asia', title=f"Provincial Debt Map: {labels[0]} vs {labels[1]}"
+    )
+    fig.update_geos(center=dict(lat=35, lon=105), projection_scale=2.5, showland=True, landcolor="#f4f4f4", showcountries=True)
+    fig.update_layout(
+        margin={"r":0,"t":40,"l":0,"b":0},
+        coloraxis_colorbar=dict(title="D/I Ratio")
+    )
+    return compact_figure(fig, precision=2)
@@ -0,0 +1,25 @@
+"""
+全局配置与配色 (Global configuration and color definition)
+
+Kept free of third-party imports so the Streamlit page can read it before
+pandas or any chart library has been loaded.
+"""
+import os
+
+# Background refresh: directory watched for new `chfs*_master*.csv` / `chfs*_hh*.csv` drops
+DATA_DIR = os.environ.get("CHFS_DATA_DIR", ".")
+REFRESH_INTERVAL_SEC = int(os.environ.get("CHFS_REFRESH_INTERVAL", "30"))
+
+COLOR_BLUE = "#5470c6"
+COLOR_YELLOW = "#fac858"
+COLOR_BG = "#ffffff"
+PLOTLY_CONFIG = {'displayModeBar': False} # Configuration to suppress the deprecation warning
+
+# 对比模式: A / B 两组的配色
+COLOR_COHORT_A = COLOR_BLUE
+COLOR_COHORT_B = "#ee6666"
+COLOR_RATIO_A = COLOR_YELLOW
+COLOR_RATIO_B = "#3ba272"
+# 图2 对比: 每组的农村部分叠在城市部分之上, 用同色系的浅色
+COLOR_COHORT_A_RURAL = "#72b0ea"
+COLOR_COHORT_B_RURAL = "#f4a6a6"
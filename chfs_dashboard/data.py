@@ -0,0 +1,246 @@
+"""
+数据加载与清洗 (无 Streamlit 依赖)
+
+Shared by the dashboard (app.py) and the query API (chfs_dashboard.api): raw CSV
+cleaning, the KPI row, and the background refresher that publishes immutable
+`DataSnapshot`s for the default data directory.
+"""
+import glob
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from . import mappings, queries
+from .config import DATA_DIR, REFRESH_INTERVAL_SEC
+
+logger = logging.getLogger(__name__)
+
+# --- 关键清洗函数：应用新的映射逻辑 ---
+def convert_city_name_advanced(val):
+    if pd.isna(val): return None
+    val_str = str(val).strip()
+    if re.search(r'[\u4e00-\u9fff]', val_str):
+        clean_name = re.sub(r'[市县地区壮族回族维吾尔自治区省]$', '', val_str)
+        clean_name = clean_name.replace('广西壮族', '广西').replace('内蒙古', '内蒙古')
+        clean_name = clean_name.replace('新疆维吾尔', '新疆').replace('宁夏回族', '宁夏')
+        return clean_name
+    try:
+        code_val = float(val_str)
+        code_int = int(code_val)
+        mapped_name = mappings.COMPREHENSIVE_CITY_CODE_MAP.get(code_int)
+        if mapped_name: return mapped_name
+        if '.' in val_str:
+            code_parts = val_str.split('.')
+            if len(code_parts) == 2:
+                main_code = int(code_parts[0][:6])
+                mapped_name = mappings.COMPREHENSIVE_CITY_CODE_MAP.get(main_code)
+                if mapped_name: return mapped_name
+    except (ValueError, TypeError):
+        pass
+    if re.search(r'\d+[\u4e00-\u9fff]+', val_str):
+        chinese_part = re.findall(r'[\u4e00-\u9fff]+', val_str)[0]
+        clean_name = re.sub(r'[市县地区壮族回族维吾尔自治区省]$', '', chinese_part)
+        return clean_name
+    return None
+
+def clean_city_name_for_map(name):
+    if pd.isna(name): return None
+    name_str = str(name).strip()
+    chinese_chars = re.findall(r'[\u4e00-\u9fff]+', name_str)
+    if not chinese_chars: return None
+    clean_name = chinese_chars[0]
+    city_coords = mappings.COMPREHENSIVE_CITY_COORDS
+    if clean_name in city_coords: return clean_name
+    for standard_name in city_coords.keys():
+        if clean_name in standard_name or standard_name in clean_name:
+            return standard_name
+    for suffix in ['市', '州', '盟']:
+        candidate = clean_name + suffix
+        if candidate in city_coords: return candidate
+    if len(clean_name) >= 2: return clean_name
+    return None
+
+def clean_data(master_file, hh_file):
+    """读取并清洗 master / hh 两张表 (纯函数, 出错直接抛异常, 供缓存加载和后台刷新共用)"""
+    # 只读取需要的列
+    master_cols = ['hhid', 'rural', 'total_debt', 'total_asset', 'weight_hh', 'total_income', 
+                   'city_lab', 'city_level', 'region', 'prov']
+    hh_cols = ['hhid', 'house01num']
+    
+    master = pd.read_csv(master_file, low_memory=False, usecols=lambda x: x in master_cols)
+    hh = pd.read_csv(hh_file, low_memory=False, usecols=lambda x: x in hh_cols)
+    df = master.merge(hh[['hhid', 'house01num']], on='hhid', how='left')
+    
+    numeric_cols = ['rural', 'total_debt', 'total_asset', 'weight_hh', 'total_income']
+    for col in numeric_cols:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = df[df['weight_hh'] > 0].copy()
+    df['total_debt'] = df['total_debt'].fillna(0).clip(lower=0)
+    df['total_income'] = df['total_income'].fillna(0).clip(lower=0)
+    
+    if 'city_lab' in df.columns:
+        df['city_raw'] = df['city_lab']
+        df['city_mapped'] = df['city_lab'].apply(convert_city_name_advanced)
+        df['final_city_name'] = df['city_mapped'].apply(clean_city_name_for_map)
+    else:
+        df['final_city_name'] = None
+
+    if 'city_level' in df.columns:
+        def map_city_tier(level):
+            if pd.isna(level): return None
+            level = str(level).strip()
+            if '一线' in level: return 'Tier 1 / New Tier 1'
+            elif '二线' in level: return 'Tier 2'
+            elif '三线' in level or '以下' in level or '非一线' in level: return 'Tier 3 & Below'
+            return 'Other'
+        df['tier_label'] = df['city_level'].apply(map_city_tier)
+
+    if 'region' in df.columns:
+         region_mapping = {'东部': 'East', '中部': 'Central', '西部': 'West', '东北': 'Northeast'}
+         df['region_en'] = df['region'].map(region_mapping).fillna(df['region'])
+         
+    return df
+
+def compute_kpis(df):
+    """顶部 KPI 行: 加权户均负债 / 收入 / 负债收入比 / 负债家庭占比"""
+    total_weight = df['weight_hh'].sum()
+    weighted_avg_debt = (df['total_debt'] * df['weight_hh']).sum() / total_weight
+    weighted_avg_income = (df['total_income'] * df['weight_hh']).sum() / total_weight
+    return {
+        'avg_debt': weighted_avg_debt,
+        'avg_income': weighted_avg_income,
+        'debt_ratio': weighted_avg_debt / weighted_avg_income if weighted_avg_income > 0 else 0,
+        'households_with_debt': df[df['total_debt'] > 0]['weight_hh'].sum() / total_weight,
+    }
+
+# --- 后台数据刷新：监视数据目录，离线重建后原子替换快照 ---
+@dataclass(frozen=True)
+class DataSnapshot:
+    """
+    One immutable, fully-built version of the cleaned data, its KPIs and the
+    chart aggregates (queries.chart_aggregates). The frames are shared by every
+    session and the API, so readers must not modify them.
+    """
+    version: int
+    master_path: str
+    hh_path: str
+    digest: str
+    loaded_at: float
+    df: pd.DataFrame
+    kpis: dict
+    aggregates: dict
+
+def find_data_files(data_dir=DATA_DIR):
+    """Return the newest (master, hh) CSV pair in `data_dir`, or (None, None)."""
+    masters = sorted(glob.glob(os.path.join(data_dir, "chfs*_master*.csv")))
+    if not masters: return None, None
+    master = masters[-1]
+    # Prefer the hh file from the same drop (chfs2019_master_202112 -> chfs2019_hh_202112)
+    paired = os.path.join(os.path.dirname(master), os.path.basename(master).replace("_master", "_hh", 1))
+    if os.path.exists(paired): return master, paired
+    hhs = sorted(glob.glob(os.path.join(data_dir, "chfs*_hh*.csv")))
+    return (master, hhs[-1]) if hhs else (None, None)
+
+def find_survey_years(data_dir=DATA_DIR):
+    """{survey year: (master, hh)} for every complete `chfs<year>_master` / `_hh` drop in `data_dir`."""
+    pairs = {}
+    for master in sorted(glob.glob(os.path.join(data_dir, "chfs*_master*.csv"))):
+        match = re.match(r'chfs(\d{4})_master', os.path.basename(master))
+        hh = os.path.join(os.path.dirname(master), os.path.basename(master).replace("_master", "_hh", 1))
+        # Later releases of the same year sort last and win
+        if match and os.path.exists(hh): pairs[int(match.group(1))] = (master, hh)
+    return pairs
+
+def _file_stats(paths):
+    stats = []
+    for p in paths:
+        info = os.stat(p)
+        stats.append((p, info.st_mtime_ns, info.st_size))
+    return tuple(stats)
+
+def _file_digest(paths, chunk_size=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    for p in paths:
+        h.update(p.encode())
+        with open(p, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                h.update(chunk)
+    return h.hexdigest()
+
+class DataRefresher:
+    """
+    Polls `data_dir` in a daemon thread and rebuilds the snapshot off the request path.
+
+    A rebuild is only triggered once the files' mtime/size have been stable for one
+    full interval (so half-copied drops are not read) and their content hash differs
+    from the live snapshot (so a plain `touch` does not reload). The new snapshot is
+    published with a single reference swap; readers never see a partial build.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, interval=REFRESH_INTERVAL_SEC):
+        self.data_dir = data_dir
+        self.interval = interval
+        self._snapshot = None
+        self.last_error = None
+        self._seen_stats = None
+        self._pending_stats = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="chfs-data-refresher", daemon=True)
+
+    def start(self):
+        # The first build is synchronous so the very first page load has data
+        self._poll_safely(require_stable=False)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def current(self):
+        return self._snapshot
+
+    def poll(self, require_stable=True):
+        master, hh = find_data_files(self.data_dir)
+        if not master: return False
+        stats = _file_stats((master, hh))
+        if stats == self._seen_stats: return False
+        if require_stable and stats != self._pending_stats:
+            # Files changed since last poll: wait one more interval for the copy to finish
+            self._pending_stats = stats
+            return False
+        self._seen_stats = stats
+        self._pending_stats = None
+
+        digest = _file_digest((master, hh))
+        old = self._snapshot
+        if old is not None and old.digest == digest: return False
+
+        df = clean_data(master, hh)
+        self._snapshot = DataSnapshot(
+            version=(old.version + 1) if old else 1,
+            master_path=master, hh_path=hh, digest=digest, loaded_at=time.time(),
+            df=df, kpis=compute_kpis(df), aggregates=queries.chart_aggregates(df),
+        )
+        logger.info("Loaded data snapshot v%d from %s", self._snapshot.version, master)
+        return True
+
+    def _poll_safely(self, require_stable=True):
+        try:
+            if self.poll(require_stable):
+                self.last_error = None
+        except Exception as e:
+            # Keep serving the previous snapshot; the next drop will retry
+            self.last_error = str(e)
+            logger.exception("Background data refresh failed")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._poll_safely()
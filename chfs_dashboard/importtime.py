@@ -0,0 +1,103 @@
+"""
+启动导入耗时检查 (Import-time benchmark)
+
+Runs `python -X importtime -c "import chfs_dashboard.ui"` in a fresh
+interpreter, prints the slowest top-level imports, and exits non-zero if
+
+- it eagerly imports a module from DEFERRED_MODULES that a bare
+  `import streamlit` does not already load (streamlit pulls in part of plotly
+  for its own theme; that part is outside this package's control), or
+- its cumulative import time is over IMPORT_BUDGET_MS:
+
+    python -m chfs_dashboard.importtime [--budget-ms 1500] [--runs 3]
+
+The best of `--runs` runs is reported, since the first one also pays for
+cold .pyc and filesystem caches. tests/test_importtime.py runs the same two
+checks (marked `slow`; deselect with `-m "not slow"`).
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Loaded lazily by chfs_dashboard.ui; importing the page module must not pull these in
+DEFERRED_MODULES = ('pandas', 'numpy', 'plotly', 'pyecharts', 'streamlit_echarts')
+
+# Total cumulative import time allowed for the page module (streamlit itself included)
+IMPORT_BUDGET_MS = float(os.environ.get("CHFS_IMPORT_BUDGET_MS", "1500"))
+
+
+def measure(module='chfs_dashboard.ui'):
+    """
+    Import `module` in a fresh interpreter and return its import subtree.
+
+    Result maps module name -> (self us, cumulative us, depth relative to
+    `module`, which is depth 0). Interpreter start-up imports are excluded.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith('import time:'): continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit(): continue
+        name = fields[2].rstrip()
+        entries.append((name.strip(), int(fields[0]), int(fields[1]), (len(name) - len(name.lstrip())) // 2))
+
+    # A module is reported after everything it imports: walk back from it while deeper
+    end = max(i for i, e in enumerate(entries) if e[0] == module)
+    root_depth = entries[end][3]
+    start = end
+    while start > 0 and entries[start - 1][3] > root_depth:
+        start -= 1
+    return {name: (own, cum, depth - root_depth) for name, own, cum, depth in entries[start:end + 1]}
+
+
+def total_ms(timings, module):
+    """Cumulative import time of `module`, including everything it imports (ms)."""
+    return timings[module][1] / 1000
+
+
+def eager_deferred(timings, baseline=(), deferred=DEFERRED_MODULES):
+    """Deferred modules in `timings` that are not already in `baseline` (outermost package only)."""
+    new = {name for name in timings if name.split('.')[0] in deferred and name not in baseline}
+    return sorted(name for name in new if name.rpartition('.')[0] not in new)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check import time of the dashboard page module.")
+    parser.add_argument('--module', default='chfs_dashboard.ui')
+    parser.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(max(args.runs, 1))]
+    timings = min(runs, key=lambda t: total_ms(t, args.module))
+    total = total_ms(timings, args.module)
+
+    # Direct imports of the measured module, slowest first
+    top = sorted(((cum, name) for name, (_, cum, depth) in timings.items() if depth == 1), reverse=True)
+    for cum, name in top[:args.top]:
+        print(f"{name:<40} {cum / 1000:>8.1f} ms")
+    print(f"{'total':<40} {total:>8.1f} ms   (budget {args.budget_ms:,.0f} ms)")
+
+    failed = False
+    eager = eager_deferred(timings, baseline=measure('streamlit'))
+    if eager:
+        print(f"EAGER IMPORT: {', '.join(eager)} loaded by `import {args.module}`", file=sys.stderr)
+        failed = True
+    if total > args.budget_ms:
+        print(f"OVER BUDGET: import {args.module} took {total:,.1f} ms > {args.budget_ms:,.0f} ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
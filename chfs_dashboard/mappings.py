@@ -0,0 +1,34 @@
+"""
+Static lookup tables: CHFS city codes, city / province coordinates and province pinyin.
+
+The tables live in mappings.json next to this file and are parsed on first
+attribute access (`mappings.PROVINCE_COORDS`), not at import time, so pages and
+tools that never touch them do not pay for them. Edit the JSON to change them;
+city-code keys are stored as strings there and converted back to int on load.
+"""
+import json
+import os
+from functools import lru_cache
+
+MAPPINGS_FILE = os.path.join(os.path.dirname(__file__), "mappings.json")
+TABLES = ('COMPREHENSIVE_CITY_CODE_MAP', 'COMPREHENSIVE_CITY_COORDS', 'PROVINCE_COORDS', 'PROVINCE_PINYIN_MAP')
+
+
+@lru_cache(maxsize=None)
+def load_tables():
+    with open(MAPPINGS_FILE, encoding='utf-8') as f:
+        tables = json.load(f)
+    tables['COMPREHENSIVE_CITY_CODE_MAP'] = {int(k): v for k, v in tables['COMPREHENSIVE_CITY_CODE_MAP'].items()}
+    return tables
+
+
+def __getattr__(name):
+    if name in TABLES:
+        # Bind all tables as real module globals so later lookups skip this hook
+        globals().update(load_tables())
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(TABLES))
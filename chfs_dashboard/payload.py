@@ -0,0 +1,132 @@
+"""
+图表负载压缩 (Chart payload compaction)
+
+Every chart is serialized to JSON and shipped to the browser on each rerun, so
+this module trims what goes over the wire:
+
+- trace data is rounded to display precision (and sent as short decimal lists
+  instead of base64 float64 blocks),
+- sunburst leaves that are a tiny share of their parent are merged into one
+  "Other (small)" leaf (queries.merge_small_leaves, applied when the sunburst
+  node tables are built, which also round the leaves to display precision
+  before summing them so parents still cover their children),
+- the Plotly template is cut down to the parts the figure actually uses,
+
+and reports the serialized size per chart. `python -m chfs_dashboard.payload`
+builds every chart from the current data and exits non-zero if one is over its
+entry in PAYLOAD_BUDGETS; tests/test_payload.py checks the same budgets against
+a synthetic frame, so a regression fails the test suite without the survey CSVs.
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+
+# Layout keys that each hold one kind of subplot; only those in use keep their template styling
+SUBPLOT_KEYS = ('xaxis', 'yaxis', 'geo', 'polar', 'ternary', 'scene', 'mapbox', 'map', 'smith')
+
+# Serialized-size budget per chart (bytes), checked by `python -m chfs_dashboard.payload`;
+# comparison-mode charts (charts.compare_builders) are held to the same budget as their default view
+PAYLOAD_BUDGETS = {
+    'urban_rural': 6_000,
+    # Comparison mode stacks urban / rural per cohort: four bar series instead of two
+    'regional_stack': 7_000,
+    # Comparison mode draws one map facet per cohort plus a delta hover column
+    'province_map': 9_000,
+    'city_tier_boxplot': 5_000,
+    'city_rank': 5_000,
+    'city_map': 10_000,
+    'debt_sunburst': 44_000,
+    'debt_income_ratio_sunburst': 40_000,
+}
+
+
+def _round_value(value, precision):
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == 'f':
+            value = np.round(value, precision)
+            # Short decimal text beats a base64 float64 block once rounded
+            return value.astype(int).tolist() if precision <= 0 and np.isfinite(value).all() else value.tolist()
+        if value.dtype.kind == 'O':
+            return [_round_value(v, precision) for v in value]
+        return value
+    if isinstance(value, (float, np.floating)):
+        return int(round(value)) if precision <= 0 and np.isfinite(value) else round(float(value), precision)
+    if isinstance(value, dict):
+        return {k: _round_value(v, precision) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_round_value(v, precision) for v in value]
+    return value
+
+
+def _strip_template(fig):
+    """Keep only the template styling that this figure's traces and subplots use."""
+    template = fig.layout.template.to_plotly_json()
+    layout = fig.to_plotly_json()['layout']
+    used_traces = {trace.type for trace in fig.data}
+
+    data = {k: v for k, v in template.get('data', {}).items() if k in used_traces}
+    tlayout = {k: v for k, v in template.get('layout', {}).items()
+               if k not in SUBPLOT_KEYS or k in layout}
+    fig.layout.template = {'data': data, 'layout': tlayout}
+
+
+def compact_figure(fig, precision=2):
+    """Round trace data to `precision` decimals and trim the template (in place)."""
+    if fig is None: return None
+    traces = []
+    for trace in fig.data:
+        props = trace.to_plotly_json()
+        # Plotly Express attaches customdata for hover even when the template never reads it
+        if 'customdata' not in (props.get('hovertemplate') or ''):
+            props.pop('customdata', None)
+        # Rebuilt rather than trace.update(): plotly keeps the old float64 array when the
+        # rounded list compares equal to it (e.g. sunburst sums of already-rounded leaves)
+        traces.append(type(trace)(_round_value(props, precision)))
+    fig.data = []
+    fig.add_traces(traces)
+    _strip_template(fig)
+    return fig
+
+
+def payload_bytes(chart):
+    """Serialized size (UTF-8 bytes) of a Plotly figure or pyecharts chart, as sent to the browser."""
+    if chart is None: return 0
+    if hasattr(chart, 'dump_options'):
+        # st_pyecharts re-serializes the options compactly; measure that, not the indented dump
+        options = json.loads(chart.dump_options())
+        return len(json.dumps(options, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    return len(chart.to_json().encode('utf-8'))
+
+
+def check_budgets(sizes, budgets=PAYLOAD_BUDGETS):
+    """Return [(name, size, budget)] for every chart over its budget."""
+    return [(name, size, budgets[name]) for name, size in sizes.items()
+            if name in budgets and size > budgets[name]]
+
+
+def main(argv=None):
+    from .charts import chart_builders
+    from .data import DATA_DIR, clean_data, find_data_files
+
+    parser = argparse.ArgumentParser(description="Report chart payload sizes and check them against PAYLOAD_BUDGETS.")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args(argv)
+
+    master, hh = find_data_files(args.data_dir)
+    if not master:
+        parser.error(f"No chfs*_master*.csv / chfs*_hh*.csv pair found in {args.data_dir}")
+    df = clean_data(master, hh)
+
+    sizes = {name: payload_bytes(build(df)) for name, build in chart_builders().items()}
+    for name, size in sizes.items():
+        print(f"{name:<28} {size:>9,} B   (budget {PAYLOAD_BUDGETS.get(name, 0):,} B)")
+    over = check_budgets(sizes)
+    for name, size, budget in over:
+        print(f"OVER BUDGET: {name} is {size:,} B > {budget:,} B", file=sys.stderr)
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,494 @@
+"""
+聚合查询层 (纯数据, 无图表依赖)
+
+Every number the dashboard charts show is computed here and returned as a plain
+DataFrame, so the `plot_*` functions in chfs_dashboard.charts and the HTTP API in
+chfs_dashboard.api read from the same code path.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import mappings
+
+# Cohort comparison: rows are tagged 'A' / 'B' in this column and it is added to the group keys
+COHORT_KEY = 'cohort'
+COHORTS = ('A', 'B')
+
+# Columns that may be used as group-by keys / filters in ad-hoc queries
+GROUP_KEYS = ('rural', 'region_en', 'prov', 'tier_label', 'final_city_name', COHORT_KEY)
+RURAL_NAMES = {0: 'Urban', 1: 'Rural'}
+
+
+def group_stats(df, by, where=None):
+    """
+    One-pass weighted aggregation over `by`.
+
+    Returns one row per group with the weighted sums (w_debt, w_income, weight,
+    and w_indebted, the weight of households with debt), the household count,
+    and the derived avg_debt / avg_income / d_i_ratio.
+    `where` is an optional {column: value or [values]} equality filter.
+    """
+    by = [by] if isinstance(by, str) else by
+    if not isinstance(by, (list, tuple)) or not all(isinstance(col, str) for col in by):
+        raise ValueError(f"Group keys must be a column name or a list of column names, got {by!r}")
+    if where is not None and not isinstance(where, dict):
+        raise ValueError(f"`where` must be a {{column: value or [values]}} object, got {where!r}")
+    by = list(by)
+    if not by:
+        raise ValueError("At least one group key is required")
+    for col in by + list(where or {}):
+        if col not in GROUP_KEYS:
+            raise ValueError(f"Unsupported group key: {col!r} (expected one of {', '.join(GROUP_KEYS)})")
+        if col not in df.columns:
+            raise ValueError(f"Column {col!r} is missing from the loaded data")
+
+    if where:
+        mask = np.ones(len(df), dtype=bool)
+        for col, value in where.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            if pd.api.types.is_numeric_dtype(df[col]):
+                # Filters from a query string arrive as text ("rural=1")
+                values = pd.to_numeric(pd.Series(list(values)), errors='coerce').tolist()
+            mask &= df[col].isin(values).to_numpy()
+        df = df[mask]
+
+    frame = pd.DataFrame({
+        'w_debt': df['total_debt'] * df['weight_hh'],
+        'w_income': df['total_income'] * df['weight_hh'],
+        'weight': df['weight_hh'],
+        'w_indebted': df['weight_hh'].where(df['total_debt'] > 0, 0),
+    })
+    for col in by:
+        frame[col] = df[col]
+
+    agg = frame.groupby(by).agg(
+        w_debt=('w_debt', 'sum'),
+        w_income=('w_income', 'sum'),
+        weight=('weight', 'sum'),
+        w_indebted=('w_indebted', 'sum'),
+        households=('weight', 'size'),
+    ).reset_index()
+
+    agg['avg_debt'] = agg['w_debt'] / agg['weight']
+    agg['avg_income'] = agg['w_income'] / agg['weight']
+    agg['d_i_ratio'] = (agg['w_debt'] / agg['w_income']).where(agg['w_income'] > 0)
+    return agg
+
+
+def _keys(keys, cohort):
+    return [COHORT_KEY] + keys if cohort else keys
+
+
+def assign_cohorts(df, column, a, b):
+    """
+    Tag rows whose `column` is in `a` as cohort 'A' and in `b` as 'B'.
+
+    Rows in neither are dropped (a row in both counts as A). The result feeds
+    the `cohort=True` variants below, which compute both sides in one groupby.
+    """
+    in_a = df[column].isin(list(a)).to_numpy()
+    in_b = df[column].isin(list(b)).to_numpy() & ~in_a
+    keep = in_a | in_b
+    return df[keep].assign(**{COHORT_KEY: np.where(in_a[keep], 'A', 'B')})
+
+
+def stack_cohorts(df_a, df_b):
+    """Concatenate two separately loaded frames (e.g. two survey years) as cohorts A / B."""
+    return pd.concat([df_a.assign(**{COHORT_KEY: 'A'}), df_b.assign(**{COHORT_KEY: 'B'})], ignore_index=True)
+
+
+def cohort_deltas(agg, index, value):
+    """Long cohort frame -> one row per `index` with A, B, delta and delta_pct for `value`."""
+    wide = agg.pivot(index=index, columns=COHORT_KEY, values=value).reindex(columns=list(COHORTS))
+    wide['delta'] = wide['B'] - wide['A']
+    wide['delta_pct'] = wide['delta'] / wide['A'].where(wide['A'] != 0)
+    wide.columns.name = None
+    return wide.reset_index()
+
+
+def compare_kpis(df):
+    """KPI 行的 A / B 对比 (index: cohort)"""
+    agg = group_stats(df, COHORT_KEY).set_index(COHORT_KEY).reindex(list(COHORTS))
+    agg['debt_ratio'] = agg['d_i_ratio'].fillna(0)
+    agg['households_with_debt'] = agg['w_indebted'] / agg['weight']
+    return agg[['avg_debt', 'avg_income', 'debt_ratio', 'households_with_debt']]
+
+
+def urban_rural(df, cohort=False):
+    """图1: 城乡加权户均负债 / 收入 / 负债收入比"""
+    if 'rural' not in df.columns: return None
+    agg = group_stats(df, _keys(['rural'], cohort))
+    agg['rural_name'] = agg['rural'].map(RURAL_NAMES)
+    agg['avg_debt_10k'] = agg['avg_debt'] / 10000
+    return agg[_keys(['rural', 'rural_name', 'avg_debt', 'avg_income', 'avg_debt_10k', 'd_i_ratio'], cohort)]
+
+
+def _regional(df, cohort):
+    """Region x urban / rural averages and region totals from one group_stats pass."""
+    keys = _keys(['region_en'], cohort)
+    by_rural = group_stats(df, keys + ['rural'])
+    pivot = by_rural.pivot(index=keys, columns='rural', values='avg_debt')
+    pivot = pivot.reindex(columns=[0, 1]).fillna(0)
+    # Region totals are re-summed from the per-(region, rural) sums, not from the households
+    by_region = by_rural.groupby(keys)[['w_debt', 'w_income', 'weight']].sum().reindex(pivot.index)
+
+    out = pivot.index.to_frame(index=False)
+    out['urban_avg_debt_10k'] = (pivot[0] / 10000).to_numpy()
+    out['rural_avg_debt_10k'] = (pivot[1] / 10000).to_numpy()
+    out['avg_debt_10k'] = (by_region['w_debt'] / by_region['weight'] / 10000).to_numpy()
+    out['d_i_ratio'] = (by_region['w_debt'] / by_region['w_income']).where(by_region['w_income'] > 0).to_numpy()
+    return out
+
+
+def regional_stack(df):
+    """图2: 各区域城 / 乡户均负债 (万元) 与区域负债收入比"""
+    if 'region_en' not in df.columns or 'rural' not in df.columns: return None
+    return _regional(df, cohort=False)[['region_en', 'urban_avg_debt_10k', 'rural_avg_debt_10k', 'd_i_ratio']]
+
+
+def regional_compare(df):
+    """
+    图2 对比模式: 各区域 A / B 的城 / 乡户均负债 (万元), 区域户均负债与负债收入比
+
+    Both cohorts and both urban / rural halves come from one group-by over
+    (cohort, region, rural).
+    """
+    if 'region_en' not in df.columns or 'rural' not in df.columns: return None
+    return _regional(df, cohort=True)
+
+
+def _province_lat_lon(prov_name):
+    name_str = str(prov_name)
+    for k, v in mappings.PROVINCE_COORDS.items():
+        if k in name_str: return v[1], v[0]
+    return None, None
+
+
+def province_map(df, cohort=False):
+    """图3: 省级户均负债 (万元) 与负债收入比, 附带省会坐标"""
+    if 'prov' not in df.columns: return None
+    agg = group_stats(df, _keys(['prov'], cohort))
+    agg['avg_debt_10k'] = agg['avg_debt'] / 10000
+    coords = [_province_lat_lon(p) for p in agg['prov']]
+    agg['lat'] = [c[0] for c in coords]
+    agg['lon'] = [c[1] for c in coords]
+    agg = agg.dropna(subset=['lat', 'lon'])
+    return agg[_keys(['prov', 'avg_debt', 'avg_debt_10k', 'w_debt', 'w_income', 'd_i_ratio', 'lat', 'lon'], cohort)].reset_index(drop=True)
+
+
+def _rank_rows(agg, n):
+    agg = agg.sort_values('avg_debt', ascending=False)
+    # National average over all mapped cities, derived from the per-city sums
+    overall = agg['w_debt'].sum() / agg['weight'].sum()
+
+    top = agg.head(n).assign(group='top', rank=range(1, min(n, len(agg)) + 1))
+    bottom = agg.tail(n).assign(group='bottom', rank=range(1, min(n, len(agg)) + 1))
+    national = pd.DataFrame({'group': ['national'], 'rank': [0], 'final_city_name': [None], 'avg_debt': [overall]})
+
+    ranked = pd.concat([top, national, bottom], ignore_index=True).rename(columns={'final_city_name': 'city'})
+    ranked['avg_debt_10k'] = ranked['avg_debt'] / 10000
+    return ranked[['group', 'rank', 'city', 'avg_debt', 'avg_debt_10k']]
+
+
+def city_rank(df, n=5, cohort=False):
+    """
+    图5: 城市加权户均负债 Top-n / Bottom-n 与全国均值
+
+    Rows are ordered as charted: top cities (highest first), the national
+    average, then the bottom cities (highest first). `group` is one of
+    'top' / 'national' / 'bottom'. With `cohort=True` each cohort is ranked
+    on its own, so A and B line up by rank position.
+    """
+    if 'final_city_name' not in df.columns: return None
+    df_valid = df.dropna(subset=['final_city_name'])
+
+    agg = group_stats(df_valid, _keys(['final_city_name'], cohort))
+    if not cohort: return _rank_rows(agg, n)
+    return pd.concat(
+        [_rank_rows(g, n).assign(**{COHORT_KEY: c}) for c, g in agg.groupby(COHORT_KEY)],
+        ignore_index=True,
+    )
+
+
+def city_map(df, limit=80):
+    """图6: 可定位城市的户均负债与负债收入比 (按负债取前 `limit` 个)"""
+    if 'final_city_name' not in df.columns: return None
+    agg = group_stats(df, 'final_city_name')
+    agg['d_i_ratio'] = agg['d_i_ratio'].fillna(0)
+    coords = agg['final_city_name'].map(mappings.COMPREHENSIVE_CITY_COORDS)
+    agg['lat'] = coords.map(lambda c: c[1] if isinstance(c, list) else None)
+    agg['lon'] = coords.map(lambda c: c[0] if isinstance(c, list) else None)
+    agg = agg.dropna(subset=['lat', 'lon'])
+    agg = agg.sort_values('avg_debt', ascending=False).head(limit)
+    agg['avg_debt_10k'] = agg['avg_debt'] / 10000
+    return agg[['final_city_name', 'avg_debt', 'avg_debt_10k', 'd_i_ratio', 'lat', 'lon']].reset_index(drop=True)
+
+
+TIER_ORDER = ("Tier 1 / New Tier 1", "Tier 2", "Tier 3 & Below")
+SUNBURST_PATH = ['rural_str', 'region_en', 'prov_pinyin', 'tier_label']
+
+# Sunburst leaves below this share of their parent are merged into one OTHER_LABEL leaf;
+# the label differs from map_city_tier's "Other" tier so the two never fold together
+SUNBURST_MIN_SHARE = float(os.environ.get("CHFS_SUNBURST_MIN_SHARE", "0.02"))
+OTHER_LABEL = "Other (small)"
+# Decimals each sunburst is drawn with (see sunburst_nodes)
+DEBT_SUNBURST_PRECISION = 0
+RATIO_SUNBURST_PRECISION = 3
+
+
+def merge_small_leaves(df, path, value, min_share=SUNBURST_MIN_SHARE):
+    """
+    Fold the deepest level of a sunburst frame into OTHER_LABEL where it is tiny.
+
+    Within each parent (all of `path` but the last level), leaves whose `value`
+    is below `min_share` of the parent total are summed into a single
+    OTHER_LABEL leaf; every other numeric column is summed as well, so callers can
+    recompute ratios from the merged totals. Parents with fewer than two such
+    leaves are left untouched, since relabelling one leaf saves nothing, and a
+    single-level `path` (no parents) is returned as is.
+    """
+    if min_share <= 0 or df.empty or len(path) < 2: return df
+    parents, leaf = list(path[:-1]), path[-1]
+
+    parent_total = df.groupby(parents)[value].transform('sum')
+    small = df[value].abs() < parent_total.abs() * min_share
+    small &= small.groupby([df[p] for p in parents]).transform('sum') >= 2
+    if not small.any(): return df
+
+    merged = df.copy()
+    merged.loc[small, leaf] = OTHER_LABEL
+    numeric = [c for c in df.columns if c not in path and pd.api.types.is_numeric_dtype(df[c])]
+    return merged.groupby(list(path), as_index=False, sort=False)[numeric].sum()
+
+
+def tier_debt_box(df):
+    """
+    图4: 各城市层级有负债家庭的负债金额箱线图统计 (Tukey)
+
+    One row per tier (in TIER_ORDER, tiers without indebted households are
+    omitted) with q1 / median / q3 / lowerfence / upperfence / notchspan, so the
+    browser gets six numbers per tier instead of every household.
+    """
+    if 'tier_label' not in df.columns: return None
+    debt = df['total_debt'].to_numpy()
+    rows = []
+    for tier in TIER_ORDER:
+        values = debt[(df['tier_label'] == tier).to_numpy() & (debt > 0)]
+        if len(values) == 0: continue
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+        iqr = q3 - q1
+        rows.append({
+            'tier_label': tier, 'q1': q1, 'median': median, 'q3': q3,
+            'lowerfence': values[values >= q1 - 1.5 * iqr].min(),
+            'upperfence': values[values <= q3 + 1.5 * iqr].max(),
+            'notchspan': 1.57 * iqr / np.sqrt(len(values)),
+        })
+    return pd.DataFrame(rows, columns=['tier_label', 'q1', 'median', 'q3', 'lowerfence', 'upperfence', 'notchspan'])
+
+
+def sunburst_hierarchy(df):
+    """
+    旭日图: 城乡 > 区域 > 省 (拼音) > 城市层级 的加权负债 / 收入合计 (叶子节点)
+
+    Missing region / province / tier become 'Unknown'; a missing rural flag
+    stays NaN in `rural_str` so each sunburst can decide how to treat it.
+    """
+    if any(col not in df.columns for col in ('rural', 'region_en', 'prov', 'tier_label')): return None
+    frame = pd.DataFrame({
+        'rural_str': df['rural'].map(RURAL_NAMES),
+        'region_en': df['region_en'].fillna('Unknown'),
+        'prov_pinyin': df['prov'].map(mappings.PROVINCE_PINYIN_MAP).fillna(df['prov']).fillna('Unknown'),
+        'tier_label': df['tier_label'].fillna('Unknown'),
+        'weighted_debt': df['total_debt'] * df['weight_hh'],
+        'weighted_income': df['total_income'] * df['weight_hh'],
+    })
+    return frame.groupby(SUNBURST_PATH, dropna=False)[['weighted_debt', 'weighted_income']].sum().reset_index()
+
+
+def sunburst_nodes(leaves, value, path=SUNBURST_PATH, precision=None):
+    """
+    Leaf rows -> one row per sunburst node at every level of `path`.
+
+    Columns are id / parent / label (as px.sunburst's ids= / parents= / names=
+    expect, with px's "a/b/c" ids), `value` summed over the node's leaves, and
+    `color`, the `value`-weighted mean of the leaves' `value` -- the same
+    numbers px.sunburst(path=..., color=value) derives, without redoing the
+    per-level grouping on every rerun.
+
+    With `precision`, leaves are rounded to that many decimals before being
+    summed: with branchvalues='total' plotly.js drops the whole trace if a
+    parent is below the sum of its children, which rounding the summed parents
+    afterwards (compact_figure) can cause.
+    """
+    if precision is not None:
+        leaves = leaves.assign(**{value: leaves[value].round(precision)})
+    leaves = leaves.assign(_weighted=leaves[value] * leaves[value])
+    levels = []
+    for depth in range(len(path), 0, -1):
+        keys = list(path[:depth])
+        node = leaves.groupby(keys, sort=False)[[value, '_weighted']].sum().reset_index()
+        ids = node[keys].astype(str).agg('/'.join, axis=1)
+        parents = node[keys[:-1]].astype(str).agg('/'.join, axis=1) if depth > 1 else ''
+        levels.append(pd.DataFrame({
+            'id': ids, 'parent': parents, 'label': node[keys[-1]].astype(str),
+            value: node[value], 'color': node['_weighted'] / node[value].where(node[value] != 0),
+        }))
+    return pd.concat(levels, ignore_index=True)
+
+
+def debt_sunburst(leaves, min_share=SUNBURST_MIN_SHARE):
+    """旭日图 (绝对债务金额) 节点表; 占上级不足 `min_share` 的城市层级合并为 OTHER_LABEL"""
+    if leaves is None: return None
+    leaves = leaves.dropna(subset=['rural_str'])[SUNBURST_PATH + ['weighted_debt']]
+    leaves = merge_small_leaves(leaves, SUNBURST_PATH, 'weighted_debt', min_share)
+    return sunburst_nodes(leaves, 'weighted_debt', precision=DEBT_SUNBURST_PRECISION)
+
+
+def debt_income_ratio_sunburst(leaves, min_share=SUNBURST_MIN_SHARE):
+    """旭日图 (债务收入比) 节点表; 占上级不足 `min_share` 的城市层级合并为 OTHER_LABEL"""
+    if leaves is None: return None
+    df_agg = leaves.fillna({'rural_str': 'Unknown'}).rename(columns={
+        'weighted_debt': 'total_weighted_debt', 'weighted_income': 'total_weighted_income'})
+
+    # Calculate the Debt-to-Income Ratio for each group
+    df_agg['debt_income_ratio'] = (df_agg['total_weighted_debt'] / df_agg['total_weighted_income']).where(
+        df_agg['total_weighted_income'] > 0, 0)
+
+    # Filter out extremely high ratios that might skew visualization due to zero income
+    df_agg = df_agg[df_agg['debt_income_ratio'] < 1000] # Cap the ratio for better visualization, adjust as needed
+
+    if df_agg.empty: return None
+
+    # Merge near-zero leaves, then recompute the merged leaves' ratio from their summed totals
+    df_agg = merge_small_leaves(df_agg, SUNBURST_PATH, 'debt_income_ratio', min_share)
+    df_agg['debt_income_ratio'] = (df_agg['total_weighted_debt'] / df_agg['total_weighted_income']).where(
+        df_agg['total_weighted_income'] > 0, 0)
+    return sunburst_nodes(df_agg, 'debt_income_ratio', precision=RATIO_SUNBURST_PRECISION)
+
+
+def chart_aggregates(df):
+    """
+    Every frame the page's non-comparison charts draw, keyed by chart name.
+
+    DataRefresher builds these once per data version, off the request path, so
+    a page rerun only formats them (see the `agg=` argument of the plot_* functions).
+    """
+    leaves = sunburst_hierarchy(df)
+    return {
+        'urban_rural': urban_rural(df),
+        'regional_stack': regional_stack(df),
+        'province_map': province_map(df),
+        'city_tier_boxplot': tier_debt_box(df),
+        'city_rank': city_rank(df),
+        'city_map': city_map(df),
+        'debt_sunburst': debt_sunburst(leaves),
+        'debt_income_ratio_sunburst': debt_income_ratio_sunburst(leaves),
+    }
+
+
+# Named queries exposed over HTTP; `group_stats` is exposed separately as "groupby"
+QUERIES = {
+    'urban_rural': urban_rural,
+    'regional_stack': regional_stack,
+    'province_map': province_map,
+    'city_rank': city_rank,
+    'city_map': city_map,
+}
+
+# Parameters a caller may pass to each named query; query-string values are converted to these types
+QUERY_PARAMS = {
+    'city_rank': {'n': int},
+    'city_map': {'limit': int},
+}
+GROUPBY_PARAMS = ('by', 'where')
+
+# Results kept per snapshot; least recently used entries are evicted beyond this
+QUERY_CACHE_SIZE = 256
+
+
+def query_params(name, params):
+    """
+    Validate the parameters of one query and convert them to their declared types.
+
+    Raises ValueError for unknown queries, unknown parameters and values that
+    do not convert (or, for the integer limits, are not positive).
+    """
+    params = params or {}
+    if not isinstance(params, dict):
+        raise ValueError(f"Parameters for {name!r} must be an object")
+    if name == 'groupby':
+        allowed = GROUPBY_PARAMS
+    elif isinstance(name, str) and name in QUERIES:
+        allowed = QUERY_PARAMS.get(name, {})
+    else:
+        raise ValueError(f"Unknown query: {name!r}")
+
+    unknown = sorted(set(params) - set(allowed))
+    if unknown:
+        raise ValueError(f"Unknown parameter(s) for {name!r}: {', '.join(map(str, unknown))}"
+                         f" (expected {', '.join(allowed) or 'none'})")
+    if name == 'groupby': return params
+
+    converted = {}
+    for key, value in params.items():
+        try:
+            converted[key] = allowed[key](value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Parameter {key!r} of {name!r} must be {allowed[key].__name__}, got {value!r}") from None
+        if converted[key] <= 0:
+            raise ValueError(f"Parameter {key!r} of {name!r} must be positive, got {value!r}")
+    return converted
+
+
+class QueryCache:
+    """
+    Per-snapshot LRU memo of query results.
+
+    Keys are (query name, validated params); the whole cache is dropped as soon
+    as a newer snapshot version is seen, so stale results are never served after
+    a background refresh, and at most `maxsize` results are kept in between.
+    """
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._version = None
+        self._results = OrderedDict()
+
+    def run(self, snapshot, name, params=None):
+        params = query_params(name, params)
+        key = (name, _freeze(params))
+        with self._lock:
+            if self._version != snapshot.version:
+                self._version = snapshot.version
+                self._results = OrderedDict()
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+
+        if name == 'groupby':
+            result = group_stats(snapshot.df, params.get('by') or [], params.get('where'))
+        elif not params and name in snapshot.aggregates:
+            # Default-parameter results were already built with the snapshot
+            result = snapshot.aggregates[name]
+        else:
+            result = QUERIES[name](snapshot.df, **params)
+
+        with self._lock:
+            if self._version == snapshot.version:
+                self._results[key] = result
+                while len(self._results) > self.maxsize:
+                    self._results.popitem(last=False)
+        return result
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
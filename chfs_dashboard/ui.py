@@ -0,0 +1,345 @@
+"""
+Streamlit 页面 (`streamlit run app.py`)
+
+Only streamlit and chfs_dashboard.config are imported up front, so the page
+chrome and sidebar render before anything heavy is loaded. pandas and the data
+layer load with the data; pyecharts (`charts.echarts`) and Plotly
+(`charts.figures`) load when the first section that draws with them renders.
+`python -m chfs_dashboard.importtime` checks that this stays true.
+"""
+import os
+import time
+
+import streamlit as st
+
+from .config import DATA_DIR
+
+# ==========================================
+# 1. 页面配置与样式
+# ==========================================
+
+def setup_page():
+    # Set page configuration
+    st.set_page_config(
+        page_title="中国家庭债务分析大屏 | CHFS",
+        page_icon="🇨🇳",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # Custom CSS styles - Enhance KPI visualization
+    st.markdown("""
+    <style>
+        .block-container {padding-top: 1.5rem; padding-bottom: 3rem;}
+        /* Optimize stMetric font size and style */
+        .stMetric > div[data-testid="stMetricValue"] {
+            font-size: 2.2rem !important;
+            font-weight: 700;
+            color: #333;
+        }
+        .stMetric {
+            background-color: #f8f9fa;
+            padding: 20px; /* Increase padding */
+            border-radius: 10px;
+            border-left: 6px solid #5470c6; /* Bold blue accent line on the left */
+            box-shadow: 0 4px 10px rgba(0,0,0,0.08); /* Increase shadow depth */
+        }
+        h1, h2, h3 {font-family: 'Segoe UI', sans-serif; color: #333;}
+        /* Adjust Streamlit Subheader spacing */
+        h3 {margin-top: 0.5rem; margin-bottom: 0.8rem;}
+    </style>
+    """, unsafe_allow_html=True)
+
+# ==========================================
+# 2. 数据加载 (见 chfs_dashboard.data)
+# ==========================================
+
+@st.cache_data
+def load_and_clean_data(master_file, hh_file, stamp=None):
+    """`stamp` only feeds the cache key (see load_survey_year)."""
+    from .data import clean_data
+    try:
+        return clean_data(master_file, hh_file)
+    except Exception as e:
+        st.error(f"数据加载失败: {e}")
+        return None
+
+@st.cache_data
+def load_chart_aggregates(master_file, hh_file):
+    """Uploaded files: chart aggregates are built once per upload, like the snapshot's."""
+    from .queries import chart_aggregates
+    df = load_and_clean_data(master_file, hh_file)
+    return None if df is None else chart_aggregates(df)
+
+def load_survey_year(master, hh):
+    """
+    Another survey year for comparison mode. The refresher only watches the
+    newest drop, so the cache key includes the files' mtime / size and a CSV
+    replaced under the same name is reloaded on the next rerun.
+    """
+    from .data import _file_stats
+    return load_and_clean_data(master, hh, _file_stats((master, hh)))
+
+@st.cache_resource
+def get_data_refresher(data_dir=DATA_DIR):
+    """进程级单例：所有会话共享同一个刷新线程"""
+    from .data import DataRefresher
+    return DataRefresher(data_dir).start()
+
+# ==========================================
+# 3. 图表输出
+# ==========================================
+
+def show_echarts(chart, height):
+    from streamlit_echarts import st_pyecharts
+    st_pyecharts(chart, height=height)
+
+def show_plotly(fig):
+    st.plotly_chart(fig, use_container_width=True)
+
+class PayloadTracker:
+    """每个图表发送到浏览器的序列化大小 (bytes), 在侧边栏汇总显示; one per page run."""
+
+    def __init__(self):
+        self.sizes = {}
+
+    def __call__(self, name, chart):
+        from .payload import payload_bytes
+        if chart is not None: self.sizes[name] = payload_bytes(chart)
+        return chart
+
+    def show(self):
+        import pandas as pd
+        from .payload import PAYLOAD_BUDGETS
+        with st.sidebar.expander("📦 Chart payload sizes"):
+            st.dataframe(pd.DataFrame({
+                'chart': list(self.sizes),
+                'KB': [round(v / 1024, 1) for v in self.sizes.values()],
+                'budget KB': [round(PAYLOAD_BUDGETS.get(k, 0) / 1024, 1) for k in self.sizes],
+            }), hide_index=True)
+
+# ==========================================
+# 4. 对比模式 (Cohort A vs B)
+# ==========================================
+
+COHORT_DIMENSIONS = {
+    "Region": 'region_en',
+    "City tier": 'tier_label',
+    "Urban / Rural": 'rural',
+    "Province": 'prov',
+}
+SURVEY_YEAR = "Survey year"
+
+def select_cohorts(df, years, current_master=None):
+    """
+    侧边栏: 选择对比维度及 A / B 两组
+
+    Returns (cohort-tagged frame, (label A, label B)), or None when comparison
+    mode is off or the selection is incomplete. Dimension cohorts are tagged on
+    the loaded frame; survey-year cohorts stack two separately loaded drops.
+    """
+    from . import queries
+
+    with st.sidebar:
+        st.header("🆚 Cohort Comparison")
+        if not st.toggle("Compare two cohorts (A vs B)", value=False): return None
+
+        dims = ([SURVEY_YEAR] if len(years) >= 2 else []) + list(COHORT_DIMENSIONS)
+        dim = st.selectbox("Compare by", dims)
+
+        if dim == SURVEY_YEAR:
+            options = sorted(years)
+            year_a = st.selectbox("Cohort A", options, index=0)
+            year_b = st.selectbox("Cohort B", [y for y in options if y != year_a], index=0)
+            frames = []
+            for year in (year_a, year_b):
+                master, hh = years[year]
+                frames.append(df if master == current_master else load_survey_year(master, hh))
+            if any(f is None for f in frames): return None
+            return queries.stack_cohorts(*frames), (str(year_a), str(year_b))
+
+        col = COHORT_DIMENSIONS[dim]
+        if col not in df.columns: return None
+        options = sorted(df[col].dropna().unique().tolist(), key=str)
+        fmt = (lambda v: queries.RURAL_NAMES.get(v, v)) if col == 'rural' else str
+        if len(options) < 2:
+            st.info("Not enough distinct values to compare.")
+            return None
+        sel_a = st.multiselect("Cohort A", options, default=options[:1], format_func=fmt)
+        rest = [o for o in options if o not in sel_a]
+        sel_b = st.multiselect("Cohort B", rest, default=rest[:1], format_func=fmt)
+        if not sel_a or not sel_b: return None
+
+    labels = (" + ".join(str(fmt(v)) for v in sel_a), " + ".join(str(fmt(v)) for v in sel_b))
+    return queries.assign_cohorts(df, col, sel_a, sel_b), labels
+
+def show_kpis(kpis, cohort):
+    kpi_cols = st.columns(4)
+    if cohort:
+        from . import queries
+        df_cmp, (label_a, label_b) = cohort
+        st.caption(f"Comparing **A: {label_a}** vs **B: {label_b}** (Δ = B − A) in the KPI row and charts 1–3, 7.")
+        cmp_kpis = queries.compare_kpis(df_cmp)
+        ka, kb = cmp_kpis.loc['A'], cmp_kpis.loc['B']
+        kpi_cols[0].metric("Avg Household Debt (A → B)", f"¥{ka['avg_debt']:,.0f} → ¥{kb['avg_debt']:,.0f}",
+                           delta=f"{kb['avg_debt'] - ka['avg_debt']:+,.0f}", delta_color="inverse")
+        kpi_cols[1].metric("Avg Household Income (A → B)", f"¥{ka['avg_income']:,.0f} → ¥{kb['avg_income']:,.0f}",
+                           delta=f"{kb['avg_income'] - ka['avg_income']:+,.0f}")
+        kpi_cols[2].metric("Debt-to-Income Ratio (A → B)", f"{ka['debt_ratio']:.1%} → {kb['debt_ratio']:.1%}",
+                           delta=f"{(kb['debt_ratio'] - ka['debt_ratio']) * 100:+.1f} pp", delta_color="inverse")
+    else:
+        kpi_cols[0].metric("Avg Household Debt", f"¥{kpis['avg_debt']:,.0f}")
+        kpi_cols[1].metric("Avg Household Income", f"¥{kpis['avg_income']:,.0f}")
+        kpi_cols[2].metric("Debt-to-Income Ratio", f"{kpis['debt_ratio']:.1%}", delta_color="inverse")
+        #kpi_cols[3].metric("Indebted Households", f"{kpis['households_with_debt']:.1%}")
+
+# ==========================================
+# 5. 图表区
+# ==========================================
+
+def show_charts(df, cohort, aggregates=None):
+    """`aggregates` (queries.chart_aggregates) are precomputed; only comparison charts aggregate here."""
+    tracked = PayloadTracker()
+    agg = aggregates or {}
+    if cohort:
+        df_cmp, labels = cohort
+
+    # Row 1 (pyecharts)
+    from .charts import echarts
+    row1_col1, row1_col2 = st.columns([1, 1])
+    with row1_col1:
+        st.subheader("1. Urban vs Rural Debt & Risk")
+        if cohort:
+            chart_ur = tracked('urban_rural', echarts.plot_urban_rural_compare(df_cmp, labels))
+        else:
+            chart_ur = tracked('urban_rural', echarts.plot_urban_rural(df, agg=agg.get('urban_rural')))
+        if chart_ur:
+            show_echarts(chart_ur, height="400px")
+        else:
+            st.warning("No urban / rural data found.")
+    with row1_col2:
+        st.subheader("2. Regional Debt & Risk")
+        if cohort:
+            chart_reg = tracked('regional_stack', echarts.plot_regional_compare(df_cmp, labels))
+        else:
+            chart_reg = tracked('regional_stack', echarts.plot_regional_stack(df, agg=agg.get('regional_stack')))
+        if chart_reg: show_echarts(chart_reg, height="400px")
+
+    # Row 2 (Plotly)
+    from .charts import figures
+    row2_col1, row2_col2 = st.columns([1, 1])
+    with row2_col1:
+        st.subheader("3. Provincial Debt & Risk Map ")
+        if cohort:
+            fig_map = tracked('province_map', figures.plot_china_map_compare(df_cmp, labels))
+        else:
+            fig_map = tracked('province_map', figures.plot_china_map_plotly(df, agg=agg.get('province_map')))
+        if fig_map:
+            show_plotly(fig_map)
+        else:
+            st.warning("No provincial data found.")
+
+    with row2_col2:
+        st.subheader("4. City Tier Leverage Distribution ")
+        chart_tier = tracked('city_tier_boxplot', figures.plot_city_tier_boxplot(df, agg=agg.get('city_tier_boxplot')))
+        if chart_tier:
+            show_plotly(chart_tier)
+        else:
+            st.info("Insufficient data for distribution analysis.")
+
+    # Row 3 (Absolute Debt Sunburst Chart - now explicitly named)
+    st.markdown("---")
+    st.subheader("5. Hierarchical Debt Distribution (Absolute Debt)")
+    st.markdown("**Hierarchy:** Urban/Rural > Region > Province > City Tier")
+
+    chart_sun_absolute = tracked('debt_sunburst', figures.plot_debt_sunburst(df, agg=agg.get('debt_sunburst')))
+    if chart_sun_absolute:
+        show_plotly(chart_sun_absolute)
+    else:
+        st.warning("Data missing for Absolute Debt Sunburst Chart.")
+
+    # New Row for Debt-to-Income Ratio Sunburst Chart
+    st.markdown("---")
+    st.subheader("6. Hierarchical Debt-to-Income Ratio Distribution")
+    st.markdown("**Hierarchy:** Urban/Rural > Region > Province > City Tier")
+
+    chart_sun_ratio = tracked('debt_income_ratio_sunburst', figures.plot_debt_income_ratio_sunburst(df, agg=agg.get('debt_income_ratio_sunburst')))
+    if chart_sun_ratio:
+        show_plotly(chart_sun_ratio)
+    else:
+        st.warning("Data missing for Debt-to-Income Ratio Sunburst Chart.")
+
+    # Row 4 (Original charts, re-indexed)
+    # st.subheader("7. Key City Debt & Risk Map")
+    # chart_geo = figures.plot_geo_debt_map_comprehensive(df, agg=agg.get('city_map'))
+    # if chart_geo:
+    #     show_plotly(chart_geo)
+    # else:
+    #     st.info("Not enough city data matched to coordinates.")
+
+    st.subheader("7. City Debt Rankings (Top 5 vs Bottom 5)")
+    if cohort:
+        chart_rank = tracked('city_rank', echarts.plot_city_rank_compare(df_cmp, labels))
+    else:
+        chart_rank = tracked('city_rank', echarts.plot_city_rank(df, agg=agg.get('city_rank')))
+    if chart_rank: show_echarts(chart_rank, height="450px")
+
+    tracked.show()
+
+# ==========================================
+# 6. 主程序逻辑
+# ==========================================
+
+def main():
+    setup_page()
+
+    with st.sidebar:
+        st.header("📂 Data Source")
+
+        upload_files = st.file_uploader("Upload CSV Files (Optional)", type=['csv'], accept_multiple_files=True)
+        master_path, hh_path = None, None
+
+        if upload_files:
+            for f in upload_files:
+                if "master" in f.name: master_path = f
+                if "hh" in f.name: hh_path = f
+
+        st.info("若未上传文件，将尝试加载默认路径或当前目录文件。")
+
+    st.title("🇨🇳CHFS-Based Analysis of Chinese Household Debt")
+    st.markdown("### Macro-Regional & City Analysis")
+
+    # Page chrome is on screen; the data layer (and pandas) loads from here on
+    from .data import compute_kpis, find_data_files, find_survey_years
+
+    df, kpis, aggregates, snapshot = None, None, None, None
+    data_found = bool(master_path and hh_path)
+    if data_found:
+        with st.spinner("Loading and Processing Data..."):
+            df = load_and_clean_data(master_path, hh_path)
+            aggregates = load_chart_aggregates(master_path, hh_path)
+        if df is not None: kpis = compute_kpis(df)
+    else:
+        # 默认数据目录由后台线程维护；本次运行只取一次快照引用，保证整次渲染使用同一版本
+        refresher = get_data_refresher()
+        snapshot = refresher.current()
+        data_found = snapshot is not None or find_data_files()[0] is not None
+        if snapshot is not None:
+            df, kpis, aggregates = snapshot.df, snapshot.kpis, snapshot.aggregates
+            with st.sidebar:
+                st.caption(f"Data v{snapshot.version}: {os.path.basename(snapshot.master_path)} "
+                           f"(loaded {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(snapshot.loaded_at))})")
+        if refresher.last_error:
+            st.error(f"数据加载失败: {refresher.last_error}")
+
+    if df is not None:
+        # 上传文件时只有一期数据; 默认目录下可按调查年份对比
+        cohort = select_cohorts(df, {} if upload_files else find_survey_years(),
+                                snapshot.master_path if snapshot else None)
+        show_kpis(kpis, cohort)
+        st.markdown("---")
+        show_charts(df, cohort, aggregates)
+    elif data_found:
+        st.error("无法处理数据，请检查文件格式。")
+    else:
+        st.warning("⚠️ Data files not found. Please upload CSVs.")
@@ -0,0 +1,50 @@
+"""Shared fixtures: a synthetic cleaned household frame and a snapshot built from it."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from chfs_dashboard import mappings
+from chfs_dashboard.data import DataSnapshot, compute_kpis
+from chfs_dashboard.queries import chart_aggregates
+
+TIERS = ["Tier 1 / New Tier 1", "Tier 2", "Tier 3 & Below", "Other"]
+REGIONS = ["East", "Central", "West", "Northeast"]
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: spawns fresh interpreters (deselect with -m 'not slow')")
+
+
+@pytest.fixture(scope='session')
+def cleaned():
+    """A synthetic frame shaped like data.clean_data output, at survey-like cardinality."""
+    rng = np.random.default_rng(2019)
+    n = 20_000
+    cities = list(mappings.COMPREHENSIVE_CITY_COORDS) + ["无坐标市"]
+    provinces = list(mappings.PROVINCE_COORDS)
+    # Every province belongs to exactly one region, as in the survey
+    prov = rng.choice(provinces, n)
+    region_of = {p: REGIONS[i % len(REGIONS)] for i, p in enumerate(provinces)}
+    debt = rng.lognormal(11, 1.5, n) * (rng.random(n) < 0.4)
+    df = pd.DataFrame({
+        'hhid': np.arange(n),
+        'rural': rng.integers(0, 2, n),
+        'total_debt': debt,
+        'total_income': rng.lognormal(11, 1, n) * (rng.random(n) < 0.97),
+        'weight_hh': rng.uniform(500, 5000, n),
+        'region_en': [region_of[p] for p in prov],
+        'prov': prov,
+        'tier_label': rng.choice(TIERS, n, p=[0.2, 0.3, 0.45, 0.05]),
+        'final_city_name': rng.choice(cities, n),
+    })
+    df.loc[rng.random(n) < 0.02, 'final_city_name'] = None
+    return df
+
+
+@pytest.fixture(scope='session')
+def snapshot(cleaned):
+    """What DataRefresher would publish for `cleaned`."""
+    return DataSnapshot(
+        version=1, master_path='chfs2019_master.csv', hh_path='chfs2019_hh.csv', digest='0' * 32,
+        loaded_at=0.0, df=cleaned, kpis=compute_kpis(cleaned), aggregates=chart_aggregates(cleaned),
+    )
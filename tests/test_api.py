@@ -0,0 +1,127 @@
+"""HTTP API (chfs_dashboard.api) against a stub refresher serving a fixed snapshot."""
+import dataclasses
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from chfs_dashboard import queries
+from chfs_dashboard.api import frame_to_records, make_server
+
+
+class StubRefresher:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def current(self):
+        return self.snapshot
+
+
+@pytest.fixture
+def serve():
+    """serve(snapshot) -> request(path, body=None) returning (status, parsed JSON)."""
+    servers = []
+
+    def start(snapshot):
+        server = make_server(port=0, refresher=StubRefresher(snapshot))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+
+        def request(path, body=None):
+            data = None if body is None else json.dumps(body).encode()
+            req = urllib.request.Request(f"http://127.0.0.1:{server.server_port}{path}", data=data)
+            try:
+                with urllib.request.urlopen(req, timeout=10) as resp:
+                    return resp.status, json.loads(resp.read())
+            except urllib.error.HTTPError as e:
+                return e.code, json.loads(e.read())
+        return request
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize('name', sorted(queries.QUERIES))
+def test_query_rows_match_chart_frames(serve, snapshot, name):
+    status, body = serve(snapshot)(f"/query/{name}")
+    assert status == 200
+    assert body['version'] == snapshot.version
+    # The charts draw snapshot.aggregates; the API must serve the same numbers
+    assert body['rows'] == frame_to_records(snapshot.aggregates[name])
+
+
+def test_query_params_reach_the_query(serve, snapshot):
+    request = serve(snapshot)
+    status, body = request("/query/city_rank?n=10")
+    assert status == 200
+    assert body['rows'] == frame_to_records(queries.city_rank(snapshot.df, n=10))
+    status, body = request("/query/city_map?limit=3")
+    assert status == 200 and len(body['rows']) == 3
+
+
+def test_groupby_with_filters(serve, snapshot):
+    status, body = serve(snapshot)("/groupby?by=region_en&rural=1")
+    assert status == 200
+    expected = queries.group_stats(snapshot.df, ['region_en'], {'rural': ['1']})
+    assert body['rows'] == frame_to_records(expected)
+
+
+@pytest.mark.parametrize('path', [
+    "/query/nope", "/query/city_rank?n=x", "/query/city_rank?foo=1", "/groupby", "/groupby?by=hhid",
+])
+def test_bad_queries_are_400(serve, snapshot, path):
+    status, body = serve(snapshot)(path)
+    assert status == 400 and body['error']
+
+
+def test_unknown_path_is_404(serve, snapshot):
+    status, _ = serve(snapshot)("/nope")
+    assert status == 404
+
+
+@pytest.mark.parametrize('query', ['', '?format=arrow'])
+def test_query_without_data_is_404(serve, snapshot, query):
+    df = snapshot.df.drop(columns=['region_en'])
+    no_region = dataclasses.replace(snapshot, df=df, aggregates=queries.chart_aggregates(df))
+    status, body = serve(no_region)(f"/query/regional_stack{query}")
+    assert status == 404
+    assert 'no data' in body['error']
+
+
+def test_no_snapshot_is_503(serve):
+    request = serve(None)
+    assert request("/health")[0] == 503
+    assert request("/query/urban_rural")[0] == 503
+    assert request("/batch", {"queries": []})[0] == 503
+
+
+def test_health(serve, snapshot):
+    status, body = serve(snapshot)("/health")
+    assert status == 200
+    assert body['status'] == 'ok' and body['version'] == snapshot.version
+
+
+def test_batch_reports_errors_per_entry(serve, snapshot):
+    status, body = serve(snapshot)("/batch", {"queries": [
+        {"name": "city_rank", "n": 2},
+        {"by": ["rural"]},
+        "abc",
+        {"name": "groupby", "by": 5},
+        {"name": "city_rank", "n": "x"},
+        {"name": "nope"},
+    ]})
+    assert status == 200
+    results = body['results']
+    assert results[0]['rows'] == frame_to_records(queries.city_rank(snapshot.df, n=2))
+    assert results[1]['rows'] == frame_to_records(queries.group_stats(snapshot.df, ['rural']))
+    assert [r.get('error') is not None for r in results] == [False, False, True, True, True, True]
+
+
+@pytest.mark.parametrize('body', [{"queries": 5}, [1], {"queries": {"name": "city_rank"}}])
+def test_malformed_batch_body_is_400(serve, snapshot, body):
+    status, reply = serve(snapshot)("/batch", body)
+    assert status == 400 and 'Invalid batch body' in reply['error']
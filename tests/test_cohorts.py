@@ -0,0 +1,92 @@
+"""Comparison mode: every cohort=True query must equal the plain query run on each cohort's slice."""
+import pandas as pd
+import pytest
+
+from chfs_dashboard import queries
+from chfs_dashboard.data import compute_kpis
+from chfs_dashboard.queries import COHORT_KEY
+
+A_TIERS = ["Tier 1 / New Tier 1"]
+B_TIERS = ["Tier 2", "Tier 3 & Below"]
+
+
+@pytest.fixture(scope='session')
+def slices(cleaned):
+    return {
+        'A': cleaned[cleaned['tier_label'].isin(A_TIERS)],
+        'B': cleaned[cleaned['tier_label'].isin(B_TIERS)],
+    }
+
+
+@pytest.fixture(scope='session')
+def df_cmp(cleaned):
+    return queries.assign_cohorts(cleaned, 'tier_label', A_TIERS, B_TIERS)
+
+
+def _cohort_rows(agg, cohort, sort_by):
+    rows = agg[agg[COHORT_KEY] == cohort].drop(columns=COHORT_KEY)
+    return rows.sort_values(sort_by).reset_index(drop=True)
+
+
+def test_assign_cohorts_drops_other_rows_and_prefers_a(cleaned):
+    tagged = queries.assign_cohorts(cleaned, 'tier_label', A_TIERS + ["Tier 2"], B_TIERS)
+    assert (tagged[tagged['tier_label'] == "Tier 2"][COHORT_KEY] == 'A').all()
+    assert set(tagged['tier_label']) == set(A_TIERS + B_TIERS)
+    assert len(tagged) == cleaned['tier_label'].isin(A_TIERS + B_TIERS).sum()
+
+
+@pytest.mark.parametrize('cohort', ['A', 'B'])
+def test_compare_kpis_matches_compute_kpis(df_cmp, slices, cohort):
+    row = queries.compare_kpis(df_cmp).loc[cohort]
+    expected = compute_kpis(slices[cohort])
+    for key, value in expected.items():
+        assert row[key] == pytest.approx(value, rel=1e-9), key
+
+
+def test_compare_kpis_of_stacked_frames(slices):
+    stacked = queries.stack_cohorts(slices['A'], slices['B'])
+    kpis = queries.compare_kpis(stacked)
+    for cohort in ('A', 'B'):
+        assert kpis.loc[cohort, 'avg_debt'] == pytest.approx(compute_kpis(slices[cohort])['avg_debt'], rel=1e-9)
+
+
+@pytest.mark.parametrize('cohort', ['A', 'B'])
+def test_urban_rural_cohort_matches_slices(df_cmp, slices, cohort):
+    got = _cohort_rows(queries.urban_rural(df_cmp, cohort=True), cohort, 'rural')
+    expected = queries.urban_rural(slices[cohort]).sort_values('rural').reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('cohort', ['A', 'B'])
+def test_province_map_cohort_matches_slices(df_cmp, slices, cohort):
+    got = _cohort_rows(queries.province_map(df_cmp, cohort=True), cohort, 'prov')
+    expected = queries.province_map(slices[cohort]).sort_values('prov').reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('cohort', ['A', 'B'])
+def test_regional_compare_matches_regional_stack(df_cmp, slices, cohort):
+    got = _cohort_rows(queries.regional_compare(df_cmp), cohort, 'region_en')
+    expected = queries.regional_stack(slices[cohort]).sort_values('region_en').reset_index(drop=True)
+    pd.testing.assert_frame_equal(got[expected.columns], expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('cohort', ['A', 'B'])
+def test_city_rank_ranks_each_cohort_on_its_own(df_cmp, slices, cohort):
+    ranked = queries.city_rank(df_cmp, n=5, cohort=True)
+    got = ranked[ranked[COHORT_KEY] == cohort].drop(columns=COHORT_KEY).reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, queries.city_rank(slices[cohort], n=5), check_dtype=False)
+
+
+def test_cohort_deltas():
+    agg = pd.DataFrame({
+        COHORT_KEY: ['A', 'B', 'A', 'B', 'B'],
+        'region_en': ['East', 'East', 'West', 'West', 'North'],
+        'avg_debt': [100.0, 150.0, 0.0, 20.0, 5.0],
+    })
+    wide = queries.cohort_deltas(agg, 'region_en', 'avg_debt').set_index('region_en')
+    assert wide.loc['East', 'delta'] == 50.0
+    assert wide.loc['East', 'delta_pct'] == 0.5
+    # No A baseline (zero or missing) gives no percentage change rather than inf
+    assert pd.isna(wide.loc['West', 'delta_pct'])
+    assert pd.isna(wide.loc['North', 'A']) and pd.isna(wide.loc['North', 'delta'])
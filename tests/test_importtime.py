@@ -0,0 +1,28 @@
+"""Import-time budget of the page module (chfs_dashboard.importtime), in fresh interpreters."""
+import pytest
+
+from chfs_dashboard.importtime import IMPORT_BUDGET_MS, eager_deferred, measure, total_ms
+
+MODULE = 'chfs_dashboard.ui'
+
+pytestmark = pytest.mark.slow
+
+
+@pytest.fixture(scope='module')
+def timings():
+    # Best of two, as the first run also pays for cold .pyc and filesystem caches
+    return min((measure(MODULE) for _ in range(2)), key=lambda t: total_ms(t, MODULE))
+
+
+def test_page_import_defers_heavy_modules(timings):
+    assert eager_deferred(timings, baseline=measure('streamlit')) == []
+
+
+def test_page_import_within_budget(timings):
+    assert total_ms(timings, MODULE) <= IMPORT_BUDGET_MS
+
+
+def test_eager_deferred_reports_outermost_new_modules():
+    timings = {name: (1, 1, 1) for name in ('chfs_dashboard.ui', 'pandas', 'pandas.core', 'plotly.io', 'json')}
+    assert eager_deferred(timings) == ['pandas', 'plotly.io']
+    assert eager_deferred(timings, baseline={'plotly.io'}) == ['pandas']
@@ -0,0 +1,90 @@
+"""Chart payload budgets (chfs_dashboard.payload) and sunburst leaf merging (queries.merge_small_leaves)."""
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+from chfs_dashboard import queries
+from chfs_dashboard.charts import chart_builders, compare_builders, figures
+from chfs_dashboard.payload import PAYLOAD_BUDGETS, check_budgets, payload_bytes
+from chfs_dashboard.queries import OTHER_LABEL, merge_small_leaves
+
+
+def test_every_chart_within_budget(cleaned):
+    sizes = {name: payload_bytes(build(cleaned)) for name, build in chart_builders().items()}
+    assert set(sizes) == set(PAYLOAD_BUDGETS)
+    assert all(size > 0 for size in sizes.values())
+    assert check_budgets(sizes) == []
+
+
+def test_compare_charts_within_budget(cleaned):
+    df_cmp = queries.assign_cohorts(cleaned, 'tier_label', ["Tier 1 / New Tier 1"], ["Tier 3 & Below"])
+    labels = ("Tier 1 / New Tier 1", "Tier 3 & Below")
+    sizes = {name: payload_bytes(build(df_cmp, labels)) for name, build in compare_builders().items()}
+    assert all(size > 0 for size in sizes.values())
+    assert check_budgets(sizes) == []
+
+
+def test_compaction_shrinks_every_plotly_chart(cleaned, monkeypatch):
+    builders = chart_builders()
+    compacted = {name: build(cleaned) for name, build in builders.items()}
+    monkeypatch.setattr(figures, 'compact_figure', lambda fig, precision=2: fig)
+    for name, chart in compacted.items():
+        if isinstance(chart, go.Figure):
+            assert payload_bytes(chart) < payload_bytes(builders[name](cleaned)), name
+
+
+@pytest.mark.parametrize('name', ['debt_sunburst', 'debt_income_ratio_sunburst'])
+def test_sunburst_parents_cover_children_after_compaction(cleaned, name):
+    trace = chart_builders()[name](cleaned).to_plotly_json()['data'][0]
+    assert trace['branchvalues'] == 'total'
+    values = dict(zip(trace['ids'], trace['values']))
+    children = pd.Series(trace['values']).groupby(pd.Series(trace['parents'])).sum().drop('', errors='ignore')
+    assert len(children) > 0
+    # plotly.js drops the whole trace if a parent is below its children's sum (ALMOST_EQUAL = 1 - 1e-6)
+    short = {pid: (values[pid], total) for pid, total in children.items() if values[pid] < total * (1 - 1e-6)}
+    assert short == {}
+
+
+def test_check_budgets_reports_overruns():
+    assert check_budgets({'city_rank': 10, 'unknown': 10**9}, {'city_rank': 5}) == [('city_rank', 10, 5)]
+
+
+def _leaves(rows):
+    return pd.DataFrame(rows, columns=['region', 'tier', 'debt', 'income'])
+
+
+def test_merge_small_leaves_folds_tiny_leaves_into_other():
+    df = _leaves([
+        ('East', 'Tier 1', 900.0, 10.0),
+        ('East', 'Tier 2', 10.0, 1.0),
+        ('East', 'Tier 3', 5.0, 2.0),
+        ('East', 'Other', 100.0, 3.0),
+        ('West', 'Tier 1', 50.0, 5.0),
+    ])
+    merged = merge_small_leaves(df, ['region', 'tier'], 'debt', min_share=0.05)
+
+    east = merged[merged['region'] == 'East'].set_index('tier')
+    # map_city_tier's real "Other" tier is not folded together with the merged leaves
+    assert sorted(east.index) == ['Other', OTHER_LABEL, 'Tier 1']
+    assert east.loc['Other', 'debt'] == 100.0
+    assert east.loc[OTHER_LABEL, 'debt'] == 15.0
+    assert east.loc[OTHER_LABEL, 'income'] == 3.0
+    assert merged['debt'].sum() == df['debt'].sum()
+    assert merged[merged['region'] == 'West']['tier'].tolist() == ['Tier 1']
+
+
+def test_merge_small_leaves_keeps_parents_with_one_small_leaf():
+    df = _leaves([
+        ('East', 'Tier 1', 900.0, 10.0),
+        ('East', 'Tier 2', 10.0, 1.0),
+        ('West', 'Tier 1', 50.0, 5.0),
+        ('West', 'Tier 2', 40.0, 4.0),
+    ])
+    merged = merge_small_leaves(df, ['region', 'tier'], 'debt', min_share=0.05)
+    pd.testing.assert_frame_equal(merged, df)
+
+
+@pytest.mark.parametrize('path, min_share', [(['tier'], 0.05), (['region', 'tier'], 0)])
+def test_merge_small_leaves_noop(path, min_share):
+    df = _leaves([('East', 'Tier 1', 900.0, 10.0), ('East', 'Tier 2', 1.0, 1.0), ('East', 'Tier 3', 1.0, 1.0)])
+    assert merge_small_leaves(df, path, 'debt', min_share=min_share) is df
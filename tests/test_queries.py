@@ -0,0 +1,100 @@
+"""Query layer: parameter validation, group_stats filters and the per-snapshot QueryCache."""
+import dataclasses
+
+import pandas as pd
+import pytest
+
+from chfs_dashboard import queries
+
+
+@pytest.mark.parametrize('name, params, expected', [
+    ('city_rank', {'n': '10'}, {'n': 10}),
+    ('city_map', {'limit': 3}, {'limit': 3}),
+    ('urban_rural', None, {}),
+    ('groupby', {'by': ['rural'], 'where': {'rural': '1'}}, {'by': ['rural'], 'where': {'rural': '1'}}),
+])
+def test_query_params_converts(name, params, expected):
+    assert queries.query_params(name, params) == expected
+
+
+@pytest.mark.parametrize('name, params, message', [
+    ('nope', {}, "Unknown query"),
+    (['city_rank'], {}, "Unknown query"),
+    ('city_rank', {'limit': 3}, "Unknown parameter"),
+    ('urban_rural', {'n': 3}, "Unknown parameter"),
+    ('city_rank', {'n': 'x'}, "must be int"),
+    ('city_rank', {'n': 0}, "must be positive"),
+    ('groupby', {'by': ['rural'], 'extra': 1}, "Unknown parameter"),
+    ('city_rank', [('n', 3)], "must be an object"),
+])
+def test_query_params_rejects(name, params, message):
+    with pytest.raises(ValueError, match=message):
+        queries.query_params(name, params)
+
+
+def test_group_stats_matches_manual_weighted_means(cleaned):
+    agg = queries.group_stats(cleaned, ['region_en', 'rural']).set_index(['region_en', 'rural'])
+    for (region, rural), g in cleaned.groupby(['region_en', 'rural']):
+        row = agg.loc[(region, rural)]
+        w = g['weight_hh']
+        assert row['households'] == len(g)
+        assert row['avg_debt'] == pytest.approx((g['total_debt'] * w).sum() / w.sum())
+        assert row['avg_income'] == pytest.approx((g['total_income'] * w).sum() / w.sum())
+        assert row['w_indebted'] == pytest.approx(w[g['total_debt'] > 0].sum())
+
+
+def test_group_stats_where_filters(cleaned):
+    # Query-string values arrive as text; numeric columns coerce them
+    filtered = queries.group_stats(cleaned, 'region_en', where={'rural': '1', 'tier_label': ['Tier 2', 'Other']})
+    subset = cleaned[(cleaned['rural'] == 1) & cleaned['tier_label'].isin(['Tier 2', 'Other'])]
+    expected = queries.group_stats(subset, 'region_en')
+    pd.testing.assert_frame_equal(filtered, expected)
+
+
+@pytest.mark.parametrize('by, where, message', [
+    ([], None, "At least one group key"),
+    (5, None, "Group keys must be"),
+    (['total_debt'], None, "Unsupported group key"),
+    (['rural'], [1], "`where` must be"),
+    (['rural'], {'hhid': 1}, "Unsupported group key"),
+])
+def test_group_stats_rejects(cleaned, by, where, message):
+    with pytest.raises(ValueError, match=message):
+        queries.group_stats(cleaned, by, where)
+
+
+def test_group_stats_missing_column(cleaned):
+    with pytest.raises(ValueError, match="missing from the loaded data"):
+        queries.group_stats(cleaned.drop(columns=['prov']), 'prov')
+
+
+def test_query_cache_memoizes_per_params(snapshot):
+    cache = queries.QueryCache()
+    first = cache.run(snapshot, 'city_rank', {'n': '3'})
+    assert cache.run(snapshot, 'city_rank', {'n': 3}) is first
+    assert len(first[first['group'] == 'top']) == 3
+    # Default-parameter named queries are served from the snapshot's prebuilt aggregates
+    assert cache.run(snapshot, 'urban_rural') is snapshot.aggregates['urban_rural']
+
+
+def test_query_cache_evicts_least_recently_used(snapshot):
+    cache = queries.QueryCache(maxsize=2)
+    one = cache.run(snapshot, 'city_rank', {'n': 1})
+    cache.run(snapshot, 'city_rank', {'n': 2})
+    assert cache.run(snapshot, 'city_rank', {'n': 1}) is one  # n=1 is now the most recent
+    cache.run(snapshot, 'city_rank', {'n': 3})                # evicts n=2
+    assert cache.run(snapshot, 'city_rank', {'n': 1}) is one
+    assert cache.run(snapshot, 'city_rank', {'n': 3}) is not None
+    assert len(cache._results) == 2
+    assert ('city_rank', (('n', 2),)) not in cache._results
+
+
+def test_query_cache_drops_results_on_new_version(snapshot):
+    cache = queries.QueryCache()
+    old = cache.run(snapshot, 'groupby', {'by': ['rural']})
+    newer = dataclasses.replace(snapshot, version=snapshot.version + 1,
+                                df=snapshot.df[snapshot.df['rural'] == 0])
+    fresh = cache.run(newer, 'groupby', {'by': ['rural']})
+    assert fresh is not old
+    assert fresh['rural'].tolist() == [0]
+    assert list(cache._results) == [('groupby', (('by', ('rural',)),))]